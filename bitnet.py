@@ -3,77 +3,70 @@
 Simplified command-line interface for BitNet.cpp application.
 All processing is done locally on your machine without requiring any cloud services or GPU.
 """
-import os
 import sys
-import json
-import argparse
-import platform
-import requests
-import subprocess
-from typing import Dict, List, Optional, Any
 
 import config
-from model_manager import ModelManager
-from inference import InferenceEngine
+from bitnet_core import (
+    BaseBitNetCLI, QUANT_TYPE_CHOICES,
+    _positive_int, _non_negative_int, _thread_count, _temperature, _json_loads
+)
 
-class BitNetCLI:
-    def __init__(self):
-        """Initialize the CLI."""
-        self.model_manager = ModelManager()
-        self.inference_engine = InferenceEngine(self.model_manager)
-        
-        # Set up API client
-        self.api_url = f"http://{config.API_HOST}:{config.API_PORT}"
-        
-        # Parse arguments
-        self.parser = self._create_parser()
-        self.args = self.parser.parse_args()
-        
-        # Run command
-        self._run_command()
+class BitNetCLI(BaseBitNetCLI):
+    # Top-level commands, each added by the matching _add_<command>_parser method
+    COMMANDS = ("list", "pull", "rm", "run", "chat", "serve", "daemon")
     
-    def _create_parser(self) -> argparse.ArgumentParser:
-        """Create argument parser with simplified commands."""
-        parser = argparse.ArgumentParser(description="BitNet.cpp CLI")
-        subparsers = parser.add_subparsers(dest="command", help="Command to run")
-        
-        # List command
-        list_parser = subparsers.add_parser("list", help="List models")
-        
-        # Pull command (download)
+    def _add_list_parser(self, subparsers) -> None:
+        """Add the list command."""
+        subparsers.add_parser("list", help="List models")
+    
+    def _add_pull_parser(self, subparsers) -> None:
+        """Add the pull (download) command."""
         pull_parser = subparsers.add_parser("pull", help="Download a model")
         pull_parser.add_argument("model_id", type=str, help="Model ID to download")
-        pull_parser.add_argument("--quant", type=str, help="Quantization type (i2_s, tl1, tl2)")
-        
-        # Remove command
+        pull_parser.add_argument("--quant", choices=QUANT_TYPE_CHOICES, help="Quantization type")
+        pull_parser.add_argument("--parallel", type=_positive_int, help="Number of files to download at once (default: up to 8, by CPU count)")
+    
+    def _add_rm_parser(self, subparsers) -> None:
+        """Add the remove command."""
         rm_parser = subparsers.add_parser("rm", help="Remove a model")
         rm_parser.add_argument("model_name", type=str, help="Model name to remove")
-        
-        # Run command
+    
+    def _add_run_parser(self, subparsers) -> None:
+        """Add the run command."""
         run_parser = subparsers.add_parser("run", help="Run a model")
         run_parser.add_argument("model", type=str, help="Model to use")
         run_parser.add_argument("--prompt", "-p", type=str, help="Prompt to generate text from")
         run_parser.add_argument("--system", "-s", type=str, help="System message for chat")
-        run_parser.add_argument("--tokens", "-n", type=int, default=128, help="Number of tokens to predict")
-        run_parser.add_argument("--threads", "-t", type=int, default=4, help="Number of threads to use")
-        run_parser.add_argument("--ctx", "-c", type=int, default=2048, help="Context size")
-        run_parser.add_argument("--temp", type=float, default=0.8, help="Temperature for sampling")
-        
-        # Chat command
+        run_parser.add_argument("--tokens", "-n", type=_positive_int, default=128, help="Number of tokens to predict")
+        run_parser.add_argument("--threads", "-t", type=_thread_count, default=4, help="Number of threads to use")
+        run_parser.add_argument("--ctx", "-c", type=_positive_int, default=2048, help="Context size")
+        run_parser.add_argument("--temp", type=_temperature, default=0.8, help="Temperature for sampling")
+        run_parser.add_argument("--prompts-file", type=str, help="JSONL file of {\"prompt\": ...} lines to run in batches ('-' for stdin)")
+        run_parser.add_argument("--batch-size", type=_positive_int, default=16, help="Number of prompts per batched request")
+    
+    def _add_chat_parser(self, subparsers) -> None:
+        """Add the chat command."""
         chat_parser = subparsers.add_parser("chat", help="Start a chat session")
         chat_parser.add_argument("model", type=str, help="Model to use")
         chat_parser.add_argument("--system", "-s", type=str, help="System message")
-        chat_parser.add_argument("--tokens", "-n", type=int, default=128, help="Number of tokens to predict")
-        chat_parser.add_argument("--threads", "-t", type=int, default=4, help="Number of threads to use")
-        chat_parser.add_argument("--ctx", "-c", type=int, default=2048, help="Context size")
-        chat_parser.add_argument("--temp", type=float, default=0.8, help="Temperature for sampling")
-        
-        # Serve command
+        chat_parser.add_argument("--tokens", "-n", type=_positive_int, default=128, help="Number of tokens to predict")
+        chat_parser.add_argument("--threads", "-t", type=_thread_count, default=4, help="Number of threads to use")
+        chat_parser.add_argument("--ctx", "-c", type=_positive_int, default=2048, help="Context size")
+        chat_parser.add_argument("--temp", type=_temperature, default=0.8, help="Temperature for sampling")
+        chat_parser.add_argument("--batch-window-ms", type=_non_negative_int, default=0, help="Send lines arriving within this window as one request (0 disables)")
+        chat_parser.add_argument("--batch-size", type=_positive_int, default=16, help="Maximum number of lines per batched request")
+    
+    def _add_serve_parser(self, subparsers) -> None:
+        """Add the serve command."""
         serve_parser = subparsers.add_parser("serve", help="Start the server")
         serve_parser.add_argument("--host", type=str, default=config.API_HOST, help="Host to bind to")
         serve_parser.add_argument("--port", type=int, default=config.API_PORT, help="Port to bind to")
-        
-        return parser
+        serve_parser.add_argument("--workers", type=_positive_int, help="Number of worker processes (default: WEB_CONCURRENCY or 1); workers do not share models, chat sessions or cached responses")
+    
+    def _add_daemon_parser(self, subparsers) -> None:
+        """Add the daemon command."""
+        daemon_parser = subparsers.add_parser("daemon", help="Manage a background server reused by later commands")
+        daemon_parser.add_argument("action", choices=["start", "stop", "status"], help="Daemon action")
     
     def _run_command(self) -> None:
         """Run the specified command."""
@@ -87,11 +80,11 @@ class BitNetCLI:
         
         # Pull command
         elif self.args.command == "pull":
-            self._pull_model()
+            self._pull_model(self.args.model_id, self.args.quant, self.args.parallel)
         
         # Remove command
         elif self.args.command == "rm":
-            self._remove_model()
+            self._remove_model(self.args.model_name)
         
         # Run command
         elif self.args.command == "run":
@@ -99,78 +92,15 @@ class BitNetCLI:
         
         # Chat command
         elif self.args.command == "chat":
-            self._chat_with_model()
+            self._chat_with_model(self.args.batch_window_ms / 1000.0, self.args.batch_size)
         
         # Serve command
         elif self.args.command == "serve":
-            self._start_server()
-    
-    def _list_models(self) -> None:
-        """List available and installed models."""
-        try:
-            # Try to use API
-            response = requests.get(f"{self.api_url}/models/installed")
-            installed_models = response.json()
-        except:
-            # Fall back to local model manager
-            installed_models = self.model_manager.list_installed_models()
+            self._start_server(self.args.host, self.args.port, self.args.workers)
         
-        if installed_models:
-            print("Installed models:")
-            for model_name, info in installed_models.items():
-                print(f"  {model_name} - {info['description']}")
-        else:
-            print("No models installed. Use 'bitnet pull <model_id>' to download a model.")
-            
-            try:
-                # Try to use API
-                response = requests.get(f"{self.api_url}/models/available")
-                available_models = response.json()
-            except:
-                # Fall back to local model manager
-                available_models = self.model_manager.list_available_models()
-            
-            print("\nAvailable models to pull:")
-            for model_id, info in available_models.items():
-                print(f"  {model_id} - {info['description']}")
-    
-    def _pull_model(self) -> None:
-        """Download a model."""
-        model_id = self.args.model_id
-        quant_type = self.args.quant
-        
-        try:
-            # Try to use API
-            response = requests.post(
-                f"{self.api_url}/models/download",
-                json={"model_id": model_id, "quant_type": quant_type}
-            )
-            print(response.json()["message"])
-        except:
-            # Fall back to local model manager
-            print(f"Downloading model {model_id}...")
-            success = self.model_manager.download_model(model_id, quant_type)
-            if success:
-                print(f"Model {model_id} downloaded successfully")
-            else:
-                print(f"Failed to download model {model_id}")
-    
-    def _remove_model(self) -> None:
-        """Remove a model."""
-        model_name = self.args.model_name
-        
-        try:
-            # Try to use API
-            response = requests.delete(f"{self.api_url}/models/{model_name}")
-            print(response.json()["message"])
-        except:
-            # Fall back to local model manager
-            print(f"Removing model {model_name}...")
-            success = self.model_manager.remove_model(model_name)
-            if success:
-                print(f"Model {model_name} removed successfully")
-            else:
-                print(f"Failed to remove model {model_name}")
+        # Daemon command
+        elif self.args.command == "daemon":
+            self._manage_daemon(self.args.action)
     
     def _run_model(self) -> None:
         """Run inference with a model."""
@@ -178,13 +108,17 @@ class BitNetCLI:
         prompt = self.args.prompt
         system = self.args.system
         
+        if self.args.prompts_file:
+            self._run_prompts_file()
+            return
+        
         if not prompt and not system:
             print("Error: Either --prompt or --system must be provided")
             return
         
         # If system is provided but no prompt, start a chat session
         if system and not prompt:
-            self._chat_with_model()
+            self._chat_with_model(0, 1)
             return
         
         # If prompt is provided, run inference
@@ -201,119 +135,54 @@ class BitNetCLI:
             full_prompt = prompt
             conversation = False
         
-        try:
-            # Try to use API
-            response = requests.post(
-                f"{self.api_url}/inference",
-                json={
-                    "model": model,
-                    "prompt": full_prompt,
-                    "n_predict": n_predict,
-                    "threads": threads,
-                    "ctx_size": ctx_size,
-                    "temperature": temperature,
-                    "conversation": conversation
-                }
-            )
-            print(response.json()["response"])
-        except:
-            # Fall back to local inference engine
-            try:
-                response = self.inference_engine.run_inference(
-                    model_name=model,
-                    prompt=full_prompt,
-                    n_predict=n_predict,
-                    threads=threads,
-                    ctx_size=ctx_size,
-                    temperature=temperature,
-                    conversation=conversation
-                )
-                print(response)
-            except Exception as e:
-                print(f"Error running inference: {e}")
+        self._run_inference(model, full_prompt, n_predict, threads, ctx_size, temperature, conversation)
     
-    def _chat_with_model(self) -> None:
-        """Start a chat session with a model."""
-        model = self.args.model
-        system = self.args.system
-        n_predict = self.args.tokens
-        threads = self.args.threads
-        ctx_size = self.args.ctx
-        temperature = self.args.temp
-        
-        # Create messages list
-        messages = []
-        if system:
-            messages.append({"role": "system", "content": system})
+    def _run_prompts_file(self) -> None:
+        """Run inference on every prompt in a JSONL file, in batches."""
+        path = self.args.prompts_file
+        try:
+            if path == "-":
+                lines = sys.stdin.readlines()
+            else:
+                with open(path, "r", encoding="utf-8") as f:
+                    lines = f.readlines()
+            prompts = [_json_loads(line)["prompt"] for line in lines if line.strip()]
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Error reading prompts from {path}: {e}")
+            return
         
-        print(f"Chat with {model} (type 'exit' to quit)")
+        if not prompts:
+            print(f"Error: No prompts found in {path}")
+            return
         
-        while True:
-            # Get user input
-            user_input = input("User: ")
-            if user_input.lower() == "exit":
-                break
-            
-            # Add user message
-            messages.append({"role": "user", "content": user_input})
-            
-            try:
-                # Try to use API
-                response = requests.post(
-                    f"{self.api_url}/chat/completions",
-                    json={
-                        "model": model,
-                        "messages": messages,
-                        "n_predict": n_predict,
-                        "threads": threads,
-                        "ctx_size": ctx_size,
-                        "temperature": temperature,
-                        "stream": False
-                    }
-                )
-                assistant_response = response.json()["choices"][0]["message"]["content"]
-            except:
-                # Fall back to local inference engine
-                try:
-                    response = self.inference_engine.chat_completion(
-                        model_name=model,
-                        messages=messages,
-                        n_predict=n_predict,
-                        threads=threads,
-                        ctx_size=ctx_size,
-                        temperature=temperature
-                    )
-                    assistant_response = response["choices"][0]["message"]["content"]
-                except Exception as e:
-                    print(f"Error running chat: {e}")
-                    continue
-            
-            # Print assistant response
-            print(f"Assistant: {assistant_response}")
-            
-            # Add assistant message
-            messages.append({"role": "assistant", "content": assistant_response})
+        # Prepend system message if provided
+        system = self.args.system
+        if system:
+            prompts = [f"System: {system}\n\nUser: {prompt}\n\nAssistant: " for prompt in prompts]
+        
+        self._run_batch_inference(
+            self.args.model,
+            prompts,
+            self.args.tokens,
+            self.args.threads,
+            self.args.ctx,
+            self.args.temp,
+            bool(system),
+            self.args.batch_size
+        )
     
-    def _start_server(self) -> None:
-        """Start the server."""
-        print(f"Starting server on {self.args.host}:{self.args.port}...")
-        
-        try:
-            # Import here to avoid circular imports
-            import uvicorn
-            from server import app
-            
-            uvicorn.run(
-                app,
-                host=self.args.host,
-                port=self.args.port
-            )
-        except ImportError:
-            # If uvicorn is not installed, use subprocess
-            subprocess.run([
-                sys.executable,
-                "server.py"
-            ])
+    def _chat_with_model(self, batch_window: float, batch_size: int) -> None:
+        """Start a chat session, sending lines typed within batch_window seconds together."""
+        self._chat(
+            self.args.model,
+            self.args.system,
+            self.args.tokens,
+            self.args.threads,
+            self.args.ctx,
+            self.args.temp,
+            batch_window=batch_window,
+            batch_size=batch_size
+        )
 
 if __name__ == "__main__":
     BitNetCLI()
@@ -0,0 +1,916 @@
+"""
+Shared command-line client for the BitNet.cpp application.
+Talks to the local API server and falls back to running models locally on CPU.
+"""
+import os
+import sys
+import json
+import time
+import pickle
+import argparse
+from functools import cached_property
+from typing import Dict, List, Optional, Tuple, Any
+
+import config
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _json_loads(data):
+    """Parse JSON, using orjson when it is installed."""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+def _json_dumps(obj) -> bytes:
+    """Serialize to UTF-8 JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+class APIError(Exception):
+    """The API server answered, but with an error or an unexpected response."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+def _api_json(response, key: Optional[str] = None) -> Any:
+    """Decode an API response, raising APIError with the server's message on failure.
+
+    Args:
+        response: requests.Response from the API server
+        key: Optional top-level field to return instead of the whole body
+
+    Returns:
+        The decoded body, or its key field
+    """
+    try:
+        data = _json_loads(response.content)
+    except ValueError:
+        raise APIError(f"Invalid response from server (HTTP {response.status_code})", response.status_code)
+
+    if response.status_code >= 400:
+        detail = data.get("detail") if isinstance(data, dict) else None
+        raise APIError(str(detail or f"HTTP {response.status_code}"), response.status_code)
+
+    if key is None:
+        return data
+    try:
+        return data[key]
+    except (KeyError, TypeError):
+        raise APIError(f"Response from server is missing '{key}'", response.status_code)
+
+def _write_assistant(text: str) -> None:
+    """Print an assistant reply without building an intermediate string."""
+    write = sys.stdout.write
+    write("Assistant: ")
+    write(text)
+    write("\n")
+    sys.stdout.flush()
+
+# Quantization types accepted on any architecture; ModelManager checks the current one
+QUANT_TYPE_CHOICES = sorted({quant for quants in config.SUPPORTED_QUANT_TYPES.values() for quant in quants})
+
+def _positive_int(value: str) -> int:
+    """Argument type for counts that must be at least 1."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+def _non_negative_int(value: str) -> int:
+    """Argument type for amounts that may be 0 but not negative."""
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must be at least 0, got {number}")
+    return number
+
+def _thread_count(value: str) -> int:
+    """Argument type for a thread count between 1 and the number of CPUs."""
+    number = int(value)
+    max_threads = os.cpu_count() or 1
+    if not 1 <= number <= max_threads:
+        raise argparse.ArgumentTypeError(f"must be between 1 and {max_threads}, got {number}")
+    return number
+
+def _temperature(value: str) -> float:
+    """Argument type for a sampling temperature between 0.0 and 2.0."""
+    number = float(value)
+    if not 0.0 <= number <= 2.0:
+        raise argparse.ArgumentTypeError(f"must be between 0.0 and 2.0, got {number}")
+    return number
+
+def _identity(string: str) -> str:
+    """Default argument type; module-level so parsers can be pickled."""
+    return string
+
+class _ArgumentParser(argparse.ArgumentParser):
+    """ArgumentParser that can be pickled for the parser cache."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.register("type", None, _identity)
+
+def _sniff_subcommand(commands) -> Optional[str]:
+    """Return the subcommand named on the command line, if it is a known one.
+
+    Args:
+        commands: Known subcommand names
+
+    Returns:
+        The subcommand, or None if help was requested first or none matched
+    """
+    argv = sys.argv[1:]
+    if not argv or argv[0].startswith("-"):
+        return None
+    return argv[0] if argv[0] in commands else None
+
+def _read_daemon_pid() -> Optional[int]:
+    """Read the daemon process id, or None if no daemon was started."""
+    try:
+        with open(config.DAEMON_PID_FILE) as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+def _is_daemon_process(pid: int, server_running: bool) -> bool:
+    """Check that pid still belongs to the server started by 'bitnet daemon start'.
+
+    The process's command line is checked where /proc provides it; elsewhere
+    the recorded pid is only trusted while the server still answers, since
+    after a crash it may have been reused by an unrelated process.
+    """
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            arguments = f.read().split(b"\0")
+    except FileNotFoundError:
+        # No such process, or no /proc on this platform
+        return server_running and not os.path.isdir("/proc")
+    except OSError:
+        return False
+    return b"serve" in arguments and any(argument.endswith(b"bitnet.py") for argument in arguments)
+
+class BaseBitNetCLI:
+    """Base class for the command-line interfaces.
+
+    Subclasses list their top-level COMMANDS, add each one's arguments in an
+    _add_<command>_parser method, and map parsed arguments onto the shared
+    commands in _run_command.
+    """
+    COMMANDS: Tuple[str, ...] = ()
+
+    # Options defaulting to environment-dependent config values; their parser default is
+    # None and they are filled in after parsing, so cached parsers never keep stale values
+    CONFIG_DEFAULTS: Dict[str, str] = {"workers": "API_WORKERS", "parallel": "DOWNLOAD_WORKERS"}
+
+    def __init__(self):
+        """Initialize the CLI."""
+        self._session = None
+        self._stdin_pending = b""
+
+        # Set up API client
+        self.api_url = f"http://{config.API_HOST}:{config.API_PORT}"
+        self._url_models = {
+            "installed": self.api_url + "/models/installed",
+            "available": self.api_url + "/models/available",
+        }
+        self._url_models_download = self.api_url + "/models/download"
+        self._url_models_prefix = self.api_url + "/models/"
+        self._url_inference = self.api_url + "/inference"
+        self._url_inference_batch = self.api_url + "/inference/batch"
+        self._url_chat = self.api_url + "/chat/completions"
+        self._url_chat_session_prefix = self.api_url + "/chat/session/"
+
+        # Parse arguments
+        self.parser = self._load_parser()
+        self.args = self.parser.parse_args()
+        for option, setting in self.CONFIG_DEFAULTS.items():
+            if option in vars(self.args) and getattr(self.args, option) is None:
+                setattr(self.args, option, getattr(config, setting))
+
+        # Run command
+        try:
+            self._run_command()
+        except APIError as e:
+            print(f"Error from server: {e}")
+            sys.exit(1)
+
+    @cached_property
+    def model_manager(self):
+        """Local model manager, only built when the API server is unreachable."""
+        from model_manager import ModelManager
+        return ModelManager()
+
+    @cached_property
+    def inference_engine(self):
+        """Local inference engine, only built when the API server is unreachable."""
+        from inference import InferenceEngine
+        return InferenceEngine(self.model_manager)
+
+    @property
+    def session(self):
+        """HTTP session for the API server, reusing keep-alive connections."""
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            self._session = requests.Session()
+            self._session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+            self._session.headers.update({"Connection": "keep-alive"})
+        return self._session
+
+    @property
+    def _api_errors(self) -> Tuple[type, ...]:
+        """Exceptions meaning the API server could not be reached, so local fallback applies."""
+        import requests
+        return (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                requests.exceptions.ChunkedEncodingError)
+
+    def _log_fallback(self, error: Exception) -> None:
+        """Report why the API was skipped when --verbose is given."""
+        if getattr(self.args, "verbose", False):
+            print(f"API server unavailable, running locally: {error}", file=sys.stderr)
+
+    def _load_parser(self) -> argparse.ArgumentParser:
+        """Load the argument parser for this invocation from the cache, or build it.
+
+        Parsers are cached per script, command and Python version, and are
+        rebuilt when the cache is older than the CLI sources or config.
+        """
+        command = _sniff_subcommand(self.COMMANDS) or "all"
+        script = sys.modules[type(self).__module__].__file__
+        name = os.path.splitext(os.path.basename(script))[0]
+        cache_path = os.path.join(
+            config.CACHE_DIR,
+            f"parser-{name}-{command}-py{sys.version_info[0]}{sys.version_info[1]}.pkl"
+        )
+
+        try:
+            sources_mtime = max(os.path.getmtime(path) for path in (script, __file__, config.__file__))
+            if os.path.getmtime(cache_path) > sources_mtime:
+                with open(cache_path, "rb") as f:
+                    return pickle.load(f)
+        except (OSError, EOFError, AttributeError, ImportError, pickle.UnpicklingError):
+            pass
+
+        parser = self._create_parser()
+
+        try:
+            os.makedirs(config.CACHE_DIR, exist_ok=True)
+            with open(cache_path, "wb") as f:
+                pickle.dump(parser, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except (OSError, AttributeError, TypeError, pickle.PicklingError):
+            pass
+
+        return parser
+
+    def _create_parser(self) -> argparse.ArgumentParser:
+        """Create argument parser.
+
+        Only the subparser for the requested command is built; all of them
+        are built when no known command is given so help and errors stay complete.
+        """
+        parser = _ArgumentParser(description="BitNet.cpp CLI")
+        parser.add_argument("--verbose", "-v", action="store_true", help="Report why the API server was not used")
+        subparsers = parser.add_subparsers(dest="command", help="Command to run")
+
+        command = _sniff_subcommand(self.COMMANDS)
+        for name in ([command] if command else self.COMMANDS):
+            getattr(self, f"_add_{name}_parser")(subparsers)
+
+        return parser
+
+    def _run_command(self) -> None:
+        """Run the specified command."""
+        raise NotImplementedError
+
+    def _get_models(self, kind: str) -> Dict[str, Dict[str, Any]]:
+        """Get installed or available models from the API.
+
+        The available list only changes with config, so it is cached on disk
+        for config.MODEL_LIST_CACHE_TTL seconds. The installed list is always
+        fetched, since API downloads finish after the request that starts them.
+
+        Args:
+            kind: Either "installed" or "available"
+
+        Returns:
+            Dictionary of models keyed by name or ID
+        """
+        if kind != "available":
+            return _api_json(self.session.get(self._url_models[kind]))
+
+        cache_path = os.path.join(config.CACHE_DIR, f"models_{kind}.json")
+        try:
+            if time.time() - os.path.getmtime(cache_path) < config.MODEL_LIST_CACHE_TTL:
+                with open(cache_path, "rb") as f:
+                    return _json_loads(f.read())
+        except (OSError, ValueError):
+            pass
+
+        response = self.session.get(self._url_models[kind])
+        models = _api_json(response)
+
+        try:
+            os.makedirs(config.CACHE_DIR, exist_ok=True)
+            with open(cache_path, "wb") as f:
+                f.write(response.content)
+        except OSError:
+            pass
+
+        return models
+
+    def _list_models(self) -> None:
+        """List installed models, or the models available to pull if none are installed."""
+        try:
+            # Try to use API
+            installed_models = self._get_models("installed")
+        except self._api_errors as e:
+            # Fall back to local model manager
+            self._log_fallback(e)
+            installed_models = self.model_manager.list_installed_models()
+
+        if installed_models:
+            print("Installed models:")
+            for model_name, info in installed_models.items():
+                print(f"  {model_name} - {info['description']}")
+        else:
+            print("No models installed. Use 'bitnet pull <model_id>' to download a model.")
+
+            try:
+                # Try to use API
+                available_models = self._get_models("available")
+            except self._api_errors as e:
+                # Fall back to local model manager
+                self._log_fallback(e)
+                available_models = self.model_manager.list_available_models()
+
+            print("\nAvailable models to pull:")
+            for model_id, info in available_models.items():
+                print(f"  {model_id} - {info['description']}")
+
+    def _list_available_models(self) -> None:
+        """List available models."""
+        try:
+            # Try to use API
+            models = self._get_models("available")
+        except self._api_errors as e:
+            # Fall back to local model manager
+            self._log_fallback(e)
+            models = self.model_manager.list_available_models()
+
+        print("Available models:")
+        for model_id, info in models.items():
+            print(f"  {model_id} - {info['description']}")
+
+    def _list_installed_models(self) -> None:
+        """List installed models."""
+        try:
+            # Try to use API
+            models = self._get_models("installed")
+        except self._api_errors as e:
+            # Fall back to local model manager
+            self._log_fallback(e)
+            models = self.model_manager.list_installed_models()
+
+        print("Installed models:")
+        for model_name, info in models.items():
+            print(f"  {model_name} - {info['description']}")
+
+    def _pull_model(self, model_id: str, quant_type: Optional[str],
+                    workers: int = config.DOWNLOAD_WORKERS) -> None:
+        """Download a model, fetching up to workers files at a time."""
+        try:
+            # Try to use API
+            response = self._post_json(
+                self._url_models_download,
+                {"model_id": model_id, "quant_type": quant_type, "workers": workers}
+            )
+            print(_api_json(response, "message"))
+        except self._api_errors as e:
+            # Fall back to local model manager
+            self._log_fallback(e)
+            print(f"Downloading model {model_id}...")
+            success = self.model_manager.download_model(model_id, quant_type, workers)
+            if success:
+                print(f"Model {model_id} downloaded successfully")
+            else:
+                print(f"Failed to download model {model_id}")
+
+    def _remove_model(self, model_name: str) -> None:
+        """Remove a model."""
+        try:
+            # Try to use API
+            response = self.session.delete(self._url_models_prefix + model_name)
+            print(_api_json(response, "message"))
+        except self._api_errors as e:
+            # Fall back to local model manager
+            self._log_fallback(e)
+            print(f"Removing model {model_name}...")
+            success = self.model_manager.remove_model(model_name)
+            if success:
+                print(f"Model {model_name} removed successfully")
+            else:
+                print(f"Failed to remove model {model_name}")
+
+    def _show_model_info(self, model_name: str) -> None:
+        """Show model info."""
+        try:
+            # Try to use API
+            response = self.session.get(self._url_models_prefix + model_name)
+            info = _api_json(response)
+        except self._api_errors as e:
+            # Fall back to local model manager
+            self._log_fallback(e)
+            info = self.model_manager.get_model_info(model_name)
+            if info is None:
+                print(f"Model {model_name} not found")
+                return
+
+        print(f"Model: {model_name}")
+        print(f"  ID: {info['model_id']}")
+        print(f"  Quantization: {info['quant_type']}")
+        print(f"  Path: {info['path']}")
+        print(f"  GGUF Path: {info['gguf_path']}")
+        print(f"  Description: {info['description']}")
+
+    def _run_inference(self,
+                       model: str,
+                       prompt: str,
+                       n_predict: int,
+                       threads: int,
+                       ctx_size: int,
+                       temperature: float,
+                       conversation: bool) -> None:
+        """Run inference and print the generated text."""
+        try:
+            # Try to use API
+            response = self._post_json(self._url_inference, {
+                "model": model,
+                "prompt": prompt,
+                "n_predict": n_predict,
+                "threads": threads,
+                "ctx_size": ctx_size,
+                "temperature": temperature,
+                "conversation": conversation
+            })
+            print(_api_json(response, "response"))
+        except self._api_errors as e:
+            # Fall back to local inference engine
+            self._log_fallback(e)
+            try:
+                response = self.inference_engine.run_inference(
+                    model_name=model,
+                    prompt=prompt,
+                    n_predict=n_predict,
+                    threads=threads,
+                    ctx_size=ctx_size,
+                    temperature=temperature,
+                    conversation=conversation
+                )
+                print(response)
+            except Exception as e:
+                print(f"Error running inference: {e}")
+
+    def _run_batch_inference(self,
+                             model: str,
+                             prompts: List[str],
+                             n_predict: int,
+                             threads: int,
+                             ctx_size: int,
+                             temperature: float,
+                             conversation: bool,
+                             batch_size: int) -> None:
+        """Run inference on several prompts and print the responses in input order.
+
+        Args:
+            model: Model to use
+            prompts: Prompts to generate text from
+            n_predict: Number of tokens to predict
+            threads: Number of threads to use
+            ctx_size: Context size
+            temperature: Temperature for sampling
+            conversation: Whether the prompts are formatted as conversations
+            batch_size: Number of prompts to send per request
+        """
+        payload = {
+            "model": model,
+            "n_predict": n_predict,
+            "threads": threads,
+            "ctx_size": ctx_size,
+            "temperature": temperature,
+            "conversation": conversation
+        }
+
+        done = 0
+        try:
+            # Try to use API
+            while done < len(prompts):
+                batch = prompts[done:done + batch_size]
+                response = self._post_json(self._url_inference_batch, {**payload, "prompts": batch})
+                for text in _api_json(response, "responses"):
+                    print(text)
+                done += len(batch)
+        except self._api_errors + (APIError,) as e:
+            # Servers without the batch endpoint answer 404; other server errors are reported
+            if isinstance(e, APIError) and e.status_code != 404:
+                raise
+
+            # Fall back to local inference engine for the prompts not answered yet
+            self._log_fallback(e)
+            for prompt in prompts[done:]:
+                try:
+                    response = self.inference_engine.run_inference(
+                        model_name=model,
+                        prompt=prompt,
+                        n_predict=n_predict,
+                        threads=threads,
+                        ctx_size=ctx_size,
+                        temperature=temperature,
+                        conversation=conversation
+                    )
+                    print(response)
+                except Exception as e:
+                    print(f"Error running inference: {e}")
+
+    def _chat(self,
+              model: str,
+              system: Optional[str],
+              n_predict: int,
+              threads: int,
+              ctx_size: int,
+              temperature: float,
+              batch_window: float = 0,
+              batch_size: int = 1) -> None:
+        """Start a chat session with a model.
+
+        Args:
+            model: Model to use
+            system: Optional system message
+            n_predict: Number of tokens to predict
+            threads: Number of threads to use
+            ctx_size: Context size
+            temperature: Temperature for sampling
+            batch_window: Seconds to wait for further lines to send with the first (0 disables)
+            batch_size: Maximum number of lines per batched request
+        """
+        # Batching reads stdin through select(), which only supports pipes and ttys on POSIX
+        if os.name == "nt":
+            batch_window = 0
+
+        # Line editing and history for input(), where the platform provides it
+        try:
+            import readline
+        except ImportError:
+            pass
+
+        # Create messages list
+        messages = []
+        if system:
+            messages.append({"role": "system", "content": system})
+
+        # Server-side session ID and how many messages it already holds
+        self._chat_session = None
+
+        print(f"Chat with {model} (type 'exit' to quit)")
+
+        while True:
+            # Get user input; Ctrl-C or end of input ends the session like "exit"
+            try:
+                if batch_window > 0:
+                    user_inputs = self._read_user_batch(batch_window, batch_size)
+                else:
+                    user_inputs = [input("User: ")]
+            except (KeyboardInterrupt, EOFError):
+                print()
+                break
+
+            # Keep the turns queued before an exit, then stop after answering them
+            exiting = not user_inputs
+            for i, user_input in enumerate(user_inputs):
+                if user_input.lower() == "exit":
+                    user_inputs = user_inputs[:i]
+                    exiting = True
+                    break
+            if not user_inputs:
+                break
+
+            # Add user messages
+            for user_input in user_inputs:
+                messages.append({"role": "user", "content": user_input})
+
+            try:
+                # Try to use API, printing tokens as they stream in
+                assistant_responses = self._stream_chat_completion(messages, {
+                    "model": model,
+                    "n_predict": n_predict,
+                    "threads": threads,
+                    "ctx_size": ctx_size,
+                    "temperature": temperature,
+                    "stream": True
+                })
+            except (APIError, KeyError, ValueError) as e:
+                # Report server errors instead of hiding them behind local inference
+                print(f"Error from server: {e}")
+                self._chat_session = None
+                del messages[len(messages) - len(user_inputs):]
+                if exiting:
+                    break
+                continue
+            except self._api_errors as e:
+                # The server may hold a partial history now, so resend it in full next time
+                self._chat_session = None
+                self._log_fallback(e)
+
+                # Fall back to local inference engine
+                try:
+                    response = self.inference_engine.chat_completion(
+                        model_name=model,
+                        messages=messages,
+                        n_predict=n_predict,
+                        threads=threads,
+                        ctx_size=ctx_size,
+                        temperature=temperature
+                    )
+                except Exception as e:
+                    print(f"Error running chat: {e}")
+                    if exiting:
+                        break
+                    continue
+
+                assistant_responses = [choice["message"]["content"] for choice in response["choices"]]
+                for assistant_response in assistant_responses:
+                    _write_assistant(assistant_response)
+
+            # Add assistant messages
+            for assistant_response in assistant_responses:
+                messages.append({"role": "assistant", "content": assistant_response})
+
+            if exiting:
+                break
+
+    def _stream_chat_completion(self, messages: List[Dict[str, str]], payload: Dict[str, Any]) -> List[str]:
+        """Request a chat completion from the API and print it as it streams.
+
+        Once the server has returned a chat session, only the messages it has
+        not seen yet are sent; the full history is sent again if the session
+        is unknown to the server. Servers that ignore "stream" and answer with
+        a complete JSON response are handled too.
+
+        Args:
+            messages: Full conversation so far
+            payload: Chat completion request body without messages
+
+        Returns:
+            List of assistant responses, one per returned choice
+        """
+        response = None
+        if self._chat_session is not None:
+            session_id, sent = self._chat_session
+            response = self._post_chat(self._url_chat_session_prefix + session_id + "/append", {**payload, "messages": messages[sent:]})
+            if response.status_code == 404:
+                # Server restarted, evicted the session, or another worker answered
+                response.close()
+                response = None
+        if response is None:
+            response = self._post_chat(self._url_chat, {**payload, "messages": messages})
+        if response.status_code >= 400:
+            _api_json(response)
+
+        session_id = response.headers.get("X-Chat-Session")
+        self._chat_session = (session_id, len(messages)) if session_id else None
+
+        if not response.headers.get("Content-Type", "").startswith("text/event-stream"):
+            assistant_responses = [choice["message"]["content"] for choice in _api_json(response, "choices")]
+            for assistant_response in assistant_responses:
+                _write_assistant(assistant_response)
+            return assistant_responses
+
+        import requests
+
+        chunks = []
+        try:
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data: "):
+                    continue
+                data = line[len("data: "):]
+                if data == "[DONE]":
+                    break
+
+                event = _json_loads(data)
+                if "error" in event:
+                    raise APIError(str(event["error"]))
+                content = event["choices"][0]["delta"].get("content")
+                if content:
+                    if not chunks:
+                        sys.stdout.write("Assistant: ")
+                    sys.stdout.write(content)
+                    sys.stdout.flush()
+                    chunks.append(content)
+        except requests.exceptions.RequestException as e:
+            # Local inference may answer instead only while nothing of this reply is printed
+            if not chunks and isinstance(e, self._api_errors):
+                raise
+            raise APIError(f"Connection to server lost during the reply: {e}") from e
+        finally:
+            if chunks:
+                sys.stdout.write("\n")
+                sys.stdout.flush()
+
+        if not chunks:
+            _write_assistant("")
+
+        return ["".join(chunks)]
+
+    def _post_json(self, url: str, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None, **kwargs):
+        """POST a JSON payload, encoding it ourselves instead of through requests' json= argument.
+
+        Args:
+            url: Endpoint URL
+            payload: JSON-serializable request body
+            headers: Extra headers to send with the Content-Type
+            **kwargs: Passed through to Session.post
+
+        Returns:
+            The requests.Response
+        """
+        return self.session.post(
+            url,
+            data=_json_dumps(payload),
+            headers={**JSON_HEADERS, **headers} if headers else JSON_HEADERS,
+            **kwargs
+        )
+
+    def _post_chat(self, url: str, payload: Dict[str, Any]):
+        """POST a chat request, asking for a streamed response."""
+        return self._post_json(
+            url,
+            payload,
+            headers={"Accept": "text/event-stream"},
+            stream=True,
+            # Fail fast on connect so the REPL falls back to local inference
+            timeout=(3, 300)
+        )
+
+    def _read_user_batch(self, window: float, batch_size: int) -> List[str]:
+        """Read the next user line plus any lines that follow within the batch window.
+
+        The buffer is flushed once it holds batch_size lines or window seconds
+        have passed since the first line arrived.
+
+        Args:
+            window: Batch window in seconds
+            batch_size: Maximum number of lines per batch
+
+        Returns:
+            List of user lines, empty at end of input
+        """
+        import select
+
+        fd = sys.stdin.fileno()
+        lines = []
+        first_arrival = None
+
+        sys.stdout.write("User: ")
+        sys.stdout.flush()
+
+        while len(lines) < batch_size:
+            if b"\n" in self._stdin_pending:
+                line, self._stdin_pending = self._stdin_pending.split(b"\n", 1)
+                lines.append(line.decode(errors="replace").rstrip("\r"))
+                if first_arrival is None:
+                    first_arrival = time.monotonic()
+                continue
+
+            if first_arrival is None:
+                timeout = None
+            else:
+                timeout = window - (time.monotonic() - first_arrival)
+                if timeout <= 0:
+                    break
+
+            ready, _, _ = select.select([fd], [], [], timeout)
+            if not ready:
+                break
+
+            data = os.read(fd, 4096)
+            if not data:
+                # End of input, keep any unterminated last line
+                if self._stdin_pending:
+                    lines.append(self._stdin_pending.decode(errors="replace"))
+                    self._stdin_pending = b""
+                break
+            self._stdin_pending += data
+
+        return lines
+
+    def _start_server(self, host: str, port: int, workers: int = 1) -> None:
+        """Start the server.
+
+        Args:
+            host: Host to bind to
+            port: Port to bind to
+            workers: Number of worker processes
+        """
+        print(f"Starting server on {host}:{port}...")
+
+        try:
+            import uvicorn
+        except ImportError:
+            # If uvicorn is not installed, use subprocess
+            import subprocess
+
+            subprocess.run([
+                sys.executable,
+                "server.py"
+            ])
+            return
+
+        import importlib.util
+
+        options = {"host": host, "port": port, "log_level": "warning"}
+
+        # Use the faster event loop and HTTP parser when they are installed
+        if importlib.util.find_spec("uvloop") is not None:
+            options["loop"] = "uvloop"
+        if importlib.util.find_spec("httptools") is not None:
+            options["http"] = "httptools"
+
+        if workers > 1:
+            # Each worker process imports the app itself
+            uvicorn.run("server:app", workers=workers, app_dir=config.BASE_DIR, **options)
+        else:
+            # Import here to avoid circular imports
+            from server import app
+
+            uvicorn.run(app, **options)
+
+    def _manage_daemon(self, action: str) -> None:
+        """Start, stop, or report on the background server.
+
+        Args:
+            action: One of "start", "stop" or "status"
+        """
+        import signal
+        import subprocess
+
+        pid = _read_daemon_pid()
+        running = self._api_available()
+
+        if action == "status":
+            if running:
+                print(f"Daemon running on {config.API_HOST}:{config.API_PORT}" + (f" (pid {pid})" if pid else ""))
+            else:
+                print("Daemon not running")
+
+        elif action == "start":
+            if running:
+                print(f"Server already running on {config.API_HOST}:{config.API_PORT}")
+                return
+
+            # Detach so the server outlives this command
+            kwargs = {}
+            if os.name == "nt":
+                kwargs["creationflags"] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+            else:
+                kwargs["start_new_session"] = True
+
+            with open(config.DAEMON_LOG_FILE, "a") as log:
+                process = subprocess.Popen(
+                    # One worker: several would each load the model and split chat sessions
+                    [sys.executable, os.path.join(config.BASE_DIR, "bitnet.py"), "serve", "--workers", "1"],
+                    cwd=config.BASE_DIR,
+                    stdin=subprocess.DEVNULL,
+                    stdout=log,
+                    stderr=log,
+                    **kwargs
+                )
+            with open(config.DAEMON_PID_FILE, "w") as f:
+                f.write(str(process.pid))
+            print(f"Daemon started on {config.API_HOST}:{config.API_PORT} (pid {process.pid})")
+
+        elif action == "stop":
+            if pid is None:
+                print("Daemon not running" if not running else "Server was not started by 'bitnet daemon start'")
+                return
+
+            # Never signal a process that merely reused the recorded pid
+            if not _is_daemon_process(pid, running):
+                print("Daemon not running")
+            else:
+                try:
+                    os.kill(pid, signal.SIGTERM)
+                    print(f"Daemon stopped (pid {pid})")
+                except OSError:
+                    print("Daemon not running")
+            os.remove(config.DAEMON_PID_FILE)
+
+    def _api_available(self) -> bool:
+        """Check whether the API server answers."""
+        try:
+            self.session.get(self.api_url + "/", timeout=1)
+            return True
+        except self._api_errors:
+            return False
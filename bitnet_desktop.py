@@ -4,45 +4,24 @@ Desktop application for BitNet.cpp.
 Provides a GUI for model management and local CPU-only inference.
 All processing is done locally on your machine without requiring any cloud services or GPU.
 """
-import os
 import sys
-import platform
-import threading
-import subprocess
-from PyQt5.QtWidgets import QApplication, QMainWindow, QMessageBox, QSystemTrayIcon, QMenu, QAction
-from PyQt5.QtCore import Qt, QSize, QThread, pyqtSignal
-from PyQt5.QtGui import QIcon
-
-# Import UI components
-from ui.main_window import MainWindow
-from ui.resources import get_icon
-from ui.styles import LIGHT_STYLESHEET, DARK_STYLESHEET
+from PyQt5.QtCore import QThread, QTimer, pyqtSignal
+
 import config
-from model_manager import ModelManager
-from inference import InferenceEngine
 
 class ServerThread(QThread):
     """Thread for running the API server in the background."""
     server_started = pyqtSignal()
     server_error = pyqtSignal(str)
 
-    def __init__(self, host, port):
+    def __init__(self, server):
         super().__init__()
-        self.host = host
-        self.port = port
+        self.server = server
 
     def run(self):
         """Run the server."""
         try:
-            # Import here to avoid circular imports
-            import uvicorn
-            from server import app
-
-            uvicorn.run(
-                app,
-                host=self.host,
-                port=self.port
-            )
+            self.server.run()
             self.server_started.emit()
         except Exception as e:
             self.server_error.emit(str(e))
@@ -51,6 +30,8 @@ class BitNetDesktop:
     """Main desktop application class."""
     def __init__(self):
         """Initialize the desktop application."""
+        from PyQt5.QtWidgets import QApplication
+
         # Create application
         self.app = QApplication(sys.argv)
         self.app.setApplicationName("BitNet.cpp Desktop")
@@ -59,24 +40,33 @@ class BitNetDesktop:
         # Set application style
         self.app.setStyle("Fusion")
 
+        # Import UI components and backends once the application exists
+        from ui.main_window import MainWindow
+        from ui.resources import get_icon
+        from model_manager import ModelManager
+        from inference import InferenceEngine
+
         # Set up model manager and inference engine
         self.model_manager = ModelManager()
         self.inference_engine = InferenceEngine(self.model_manager)
 
         # Create main window
         self.main_window = MainWindow(self.model_manager, self.inference_engine)
-        self.main_window.setWindowIcon(get_icon())
+        self._icon = get_icon()
+        self.main_window.setWindowIcon(self._icon)
 
         # Set up system tray
         self.setup_system_tray()
 
-        # Start server in background
-        self.start_server()
+        # Start server in background once the first frame has been painted
+        QTimer.singleShot(0, self.start_server)
 
     def setup_system_tray(self):
         """Set up system tray icon and menu."""
+        from PyQt5.QtWidgets import QSystemTrayIcon, QMenu, QAction
+
         self.tray_icon = QSystemTrayIcon(self.app)
-        self.tray_icon.setIcon(get_icon())
+        self.tray_icon.setIcon(self._icon)
 
         # Create tray menu
         tray_menu = QMenu()
@@ -110,7 +100,17 @@ class BitNetDesktop:
 
     def start_server(self):
         """Start the API server in the background."""
-        self.server_thread = ServerThread(config.API_HOST, config.API_PORT)
+        # Import on the main thread so the server thread does not hold the
+        # import lock while the window is drawing
+        try:
+            import uvicorn
+            from server import app
+        except Exception as e:
+            self.on_server_error(str(e))
+            return
+
+        server = uvicorn.Server(uvicorn.Config(app, host=config.API_HOST, port=config.API_PORT))
+        self.server_thread = ServerThread(server)
         self.server_thread.server_started.connect(self.on_server_started)
         self.server_thread.server_error.connect(self.on_server_error)
         self.server_thread.start()
@@ -121,6 +121,8 @@ class BitNetDesktop:
 
     def on_server_error(self, error):
         """Handle server error event."""
+        from PyQt5.QtWidgets import QMessageBox
+
         print(f"Server error: {error}")
         QMessageBox.critical(
             self.main_window,
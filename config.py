@@ -5,6 +5,7 @@ No cloud services or GPU acceleration is required.
 """
 import os
 from pathlib import Path
+from types import MappingProxyType
 
 # Base directory for the application
 BASE_DIR = Path(os.path.dirname(os.path.abspath(__file__)))
@@ -15,6 +16,13 @@ MODELS_DIR = os.path.join(BASE_DIR, "models")
 # Directory for logs
 LOGS_DIR = os.path.join(BASE_DIR, "logs")
 
+# BitNet.cpp checkout, whose utils convert Hugging Face models to GGUF
+BITNET_DIR = os.path.join(BASE_DIR, "BitNet")
+
+# Directory for CLI caches and how long cached model lists stay fresh (seconds)
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "bitnet")
+MODEL_LIST_CACHE_TTL = 60
+
 # Default model settings
 DEFAULT_MODEL = "microsoft/BitNet-b1.58-2B-4T"
 
@@ -22,10 +30,59 @@ DEFAULT_MODEL = "microsoft/BitNet-b1.58-2B-4T"
 API_HOST = "127.0.0.1"
 API_PORT = 8000
 
+# Origins allowed to call the API from a browser, as a comma-separated
+# BITNET_CORS_ORIGINS list; "*" allows any origin, without credentials
+CORS_ORIGINS = [origin.strip() for origin in (os.environ.get("BITNET_CORS_ORIGINS") or "*").split(",") if origin.strip()]
+
+# Number of uvicorn worker processes for the standalone server, overridable with the
+# conventional WEB_CONCURRENCY variable. Each worker loads its own copy of the model and
+# keeps its own chat sessions and response cache, so more than one is opt-in only
+API_WORKERS = int(os.environ.get("WEB_CONCURRENCY", 1))
+
+# Number of files downloaded concurrently when pulling a model
+DOWNLOAD_WORKERS = min(8, os.cpu_count() or 1)
+
+# Maximum number of chat histories the server keeps for incremental requests
+CHAT_SESSION_LIMIT = 256
+
+# Maximum number of deterministic (temperature 0) responses the server caches,
+# and how long a cached response is served (seconds)
+RESPONSE_CACHE_SIZE = 512
+RESPONSE_CACHE_TTL = 600
+
+# Seconds to wait for a resident llama-server to load its model
+LLAMA_SERVER_STARTUP_TIMEOUT = 300
+
+# Sequences a resident llama-server decodes together
+LLAMA_SERVER_SLOTS = min(4, os.cpu_count() or 1)
+
+# Threads and per-slot context size a resident llama-server is started with. They
+# are fixed while it runs, so a request asking for other values does not restart it
+LLAMA_SERVER_THREADS = int(os.environ.get("BITNET_SERVER_THREADS", os.cpu_count() or 1))
+LLAMA_SERVER_CTX_SIZE = int(os.environ.get("BITNET_SERVER_CTX_SIZE", 2048))
+
+# Longest prompt passed to llama-cli on the command line; longer ones go through a file
+PROMPT_ARG_LIMIT = 8192
+
+# Background server started by `bitnet daemon start`
+DAEMON_PID_FILE = os.path.join(LOGS_DIR, "daemon.pid")
+DAEMON_LOG_FILE = os.path.join(LOGS_DIR, "daemon.log")
+
+# Whether closing the desktop window asks for confirmation; set
+# BITNET_ASK_ON_EXIT=0 to close immediately, e.g. for scripted shutdown
+ASK_ON_EXIT = os.environ.get("BITNET_ASK_ON_EXIT", "1") == "1"
+
 # Supported quantization types by architecture
 SUPPORTED_QUANT_TYPES = {
-    "arm64": ["i2_s", "tl1"],
-    "x86_64": ["i2_s", "tl2"]
+    "arm64": frozenset({"i2_s", "tl1"}),
+    "x86_64": frozenset({"i2_s", "tl2"})
+}
+
+# Quantization type used when none is requested. x86_64 keeps i2_s, which runs any
+# model; tl2 kernels are generated for one model at build time, so it is opt-in
+DEFAULT_QUANT_TYPES = {
+    "arm64": "tl1",
+    "x86_64": "i2_s"
 }
 
 # Supported models from Hugging Face
@@ -76,11 +133,20 @@ OS_EXTRA_ARGS = {
 }
 
 # Architecture aliases
-ARCH_ALIAS = {
+ARCH_ALIAS = MappingProxyType({
     "AMD64": "x86_64",
     "x86": "x86_64",
     "x86_64": "x86_64",
     "aarch64": "arm64",
     "arm64": "arm64",
     "ARM64": "arm64",
-}
+})
+
+# Operating system and normalized CPU architecture, resolved once at import.
+# os.uname() gives the same answers as the platform module without importing it.
+if hasattr(os, "uname"):
+    SYSTEM, _MACHINE = os.uname().sysname, os.uname().machine
+else:
+    import platform
+    SYSTEM, _MACHINE = platform.system(), platform.machine()
+ARCH = ARCH_ALIAS.get(_MACHINE, _MACHINE)
@@ -3,16 +3,48 @@ Inference module for BitNet.cpp application.
 Handles running inference on models locally on CPU.
 """
 import os
-import sys
 import json
 import logging
-import platform
-import subprocess
+import socket
+import atexit
+import tempfile
 import threading
+import subprocess
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from time import sleep, time as _now
 from typing import Dict, List, Optional, Tuple, Any, Callable, Iterator
 
 import config
-from model_manager import ModelManager
+from model_manager import ModelManager, find_build_binary
+
+# Returned by _get_llama_cli_path when the mock llama-cli should run in-process
+MOCK_LLAMA_CLI = "__inproc_mock__"
+MOCK_LLAMA_CLI_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_llama_cli.py")
+
+# Prompt prefix for each chat role; messages with other roles are skipped
+ROLE_PREFIXES = {
+    "system": "System: ",
+    "user": "User: ",
+    "assistant": "Assistant: ",
+}
+
+def format_chat_prompt(messages: List[Dict[str, str]]) -> str:
+    """Format chat messages into a prompt ending with the assistant's turn.
+
+    Args:
+        messages: List of messages in the conversation
+
+    Returns:
+        Prompt text
+    """
+    parts = [
+        f"{ROLE_PREFIXES[message['role']]}{message['content']}\n\n"
+        for message in messages
+        if message["role"] in ROLE_PREFIXES
+    ]
+    parts.append("Assistant: ")
+    return "".join(parts)
 
 class InferenceEngine:
     def __init__(self, model_manager: ModelManager):
@@ -23,19 +55,27 @@ class InferenceEngine:
         """
         self.model_manager = model_manager
 
-        # Set up logging
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(os.path.join(model_manager.logs_dir, "inference.log")),
-                logging.StreamHandler()
-            ]
-        )
+        # Set up logging, attaching handlers only for the first instance
         self.logger = logging.getLogger("inference")
-
-        # Get system information
-        self.system = platform.system()
+        if not self.logger.handlers:
+            formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+            for handler in (logging.FileHandler(os.path.join(model_manager.logs_dir, "inference.log")),
+                            logging.StreamHandler()):
+                handler.setFormatter(formatter)
+                self.logger.addHandler(handler)
+            self.logger.setLevel(logging.INFO)
+            self.logger.propagate = False
+
+        # Resolve llama-cli once; inference calls reuse the result
+        self._llama_cli_path = self._get_llama_cli_path()
+
+        # Resident llama-server, started on first use so the model stays loaded between requests
+        self._llama_server_path = self._get_llama_server_path()
+        self._server_lock = threading.Lock()
+        self._server_process = None
+        self._server_key = None
+        self._server_url = None
+        self._http_session = None
 
     def _get_llama_cli_path(self) -> str:
         """Get the path to the llama-cli binary.
@@ -45,63 +85,227 @@ class InferenceEngine:
         """
         # Check if we're in mock mode
         if os.environ.get("BITNET_MOCK_MODE", "1") == "1":
-            # Return the path to our mock script
-            mock_path = os.path.join(os.path.dirname(__file__), "mock_llama_cli.py")
-
-            # Create the mock script if it doesn't exist
-            if not os.path.exists(mock_path):
-                with open(mock_path, "w") as f:
-                    f.write('''#!/usr/bin/env python3
-import sys
-import time
-import random
-
-def main():
-    """Mock implementation of llama-cli for testing."""
-    # Parse arguments
-    prompt = ""
-    for i, arg in enumerate(sys.argv):
-        if arg == "-p" and i + 1 < len(sys.argv):
-            prompt = sys.argv[i + 1]
-
-    # Print the prompt first
-    print(prompt)
-
-    # Generate some mock response
-    responses = [
-        "I'm a BitNet model running in mock mode. I can't provide real responses yet.",
-        "This is a placeholder response from the mock llama-cli implementation.",
-        "When the real BitNet.cpp integration is complete, you'll see actual model outputs here.",
-        "For now, I'm just generating random text to simulate a response."
-    ]
+            return self._get_mock_path()
 
-    # Print the response with some delay to simulate thinking
-    time.sleep(1)
-    for char in random.choice(responses):
-        print(char, end="", flush=True)
-        time.sleep(0.01)
-    print()
+        # Real implementation would look for the actual binary
+        main_path = find_build_binary("llama-cli")
+        if main_path is None:
+            self.logger.warning("llama-cli binary not found in build/bin, using mock implementation")
+            return self._get_mock_path()
 
-if __name__ == "__main__":
-    main()
-''')
+        return main_path
 
-            return sys.executable + " " + mock_path
+    def _get_mock_path(self) -> str:
+        """Select the mock llama-cli, which runs in-process (see mock_llama_cli.generate).
 
-        # Real implementation would look for the actual binary
-        build_dir = "build"
-        if self.system == "Windows":
-            main_path = os.path.join(build_dir, "bin", "Release", "llama-cli.exe")
-            if not os.path.exists(main_path):
-                main_path = os.path.join(build_dir, "bin", "llama-cli")
-        else:
-            main_path = os.path.join(build_dir, "bin", "llama-cli")
+        Raises:
+            FileNotFoundError: If mock_llama_cli.py is missing from the application directory
+        """
+        if not os.path.exists(MOCK_LLAMA_CLI_PATH):
+            raise FileNotFoundError(f"Mock llama-cli not found at {MOCK_LLAMA_CLI_PATH}")
+        return MOCK_LLAMA_CLI
 
-        if not os.path.exists(main_path):
-            self.logger.warning(f"llama-cli binary not found at {main_path}, using mock implementation")
-            return self._get_llama_cli_path()  # Recursively call to get mock path
+    def _get_llama_server_path(self) -> Optional[str]:
+        """Get the path to the llama-server binary built alongside llama-cli.
 
-        return main_path
+        Returns:
+            Path to llama-server, or None to run llama-cli once per request
+        """
+        if self._llama_cli_path == MOCK_LLAMA_CLI:
+            return None
+
+        server_path = find_build_binary("llama-server")
+        if server_path is None:
+            self.logger.info("llama-server binary not found in build/bin, starting llama-cli per request")
+            return None
+
+        return server_path
+
+    def _ensure_server(self, model_path: str) -> str:
+        """Start llama-server for a model unless it is already serving it.
+
+        The server is only restarted when the model changes. It runs
+        config.LLAMA_SERVER_SLOTS sequences at once with continuous batching,
+        using config.LLAMA_SERVER_THREADS threads and giving each slot
+        config.LLAMA_SERVER_CTX_SIZE tokens of context.
+
+        Returns:
+            Base URL of the running server
+        """
+        key = model_path
+        with self._server_lock:
+            if self._server_process is not None and self._server_process.poll() is None and self._server_key == key:
+                return self._server_url
+
+            self.close()
+
+            # Let the OS pick a free port
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+                sock.bind(("127.0.0.1", 0))
+                port = sock.getsockname()[1]
+
+            command = [
+                self._llama_server_path,
+                '-m', model_path,
+                '-t', str(config.LLAMA_SERVER_THREADS),
+                '-c', str(config.LLAMA_SERVER_CTX_SIZE * config.LLAMA_SERVER_SLOTS),
+                '-np', str(config.LLAMA_SERVER_SLOTS),
+                '-cb',
+                '-ngl', '0',
+                '--host', '127.0.0.1',
+                '--port', str(port),
+            ]
+
+            self.logger.info(f"Starting llama-server for {model_path} on port {port}")
+            with open(os.path.join(self.model_manager.logs_dir, "llama_server.log"), "ab") as log:
+                self._server_process = subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT)
+            if self._server_key is None:
+                atexit.register(self.close)
+            self._server_key = key
+            self._server_url = f"http://127.0.0.1:{port}"
+
+            # Wait until the model is loaded; /health answers 503 until then
+            deadline = _now() + config.LLAMA_SERVER_STARTUP_TIMEOUT
+            while True:
+                if self._server_process.poll() is not None:
+                    self._server_process = None
+                    raise RuntimeError("llama-server exited during startup, see llama_server.log")
+                try:
+                    if self._http.get(self._server_url + "/health", timeout=1).status_code == 200:
+                        return self._server_url
+                except OSError:
+                    pass
+                if _now() > deadline:
+                    self.close()
+                    raise RuntimeError("Timed out waiting for llama-server to load the model")
+                sleep(0.1)
+
+    @property
+    def _http(self):
+        """HTTP session for the resident llama-server."""
+        if self._http_session is None:
+            import requests
+
+            self._http_session = requests.Session()
+        return self._http_session
+
+    def _server_completion(self,
+                           model_path: str,
+                           prompt: str,
+                           n_predict: int,
+                           temperature: float,
+                           callback: Optional[Callable[[str], None]] = None) -> str:
+        """Generate text with the resident llama-server.
+
+        The server's thread count and context size come from config, so
+        requests sharing it cannot force a restart.
+
+        Args:
+            model_path: Path to the model's GGUF file
+            prompt: Prompt to generate text from
+            n_predict: Number of tokens to predict
+            temperature: Temperature for sampling
+            callback: If given, called with each chunk as it is generated
+
+        Returns:
+            Generated text, without the prompt
+        """
+        url = self._ensure_server(model_path) + "/completion"
+        payload = {
+            "prompt": prompt,
+            "n_predict": n_predict,
+            "temperature": temperature,
+            "stream": callback is not None,
+        }
+
+        try:
+            response = self._http.post(url, data=json.dumps(payload),
+                                       headers={"Content-Type": "application/json"},
+                                       stream=callback is not None, timeout=(5, None))
+            response.raise_for_status()
+            if callback is None:
+                return response.json()["content"]
+
+            chunks = []
+            for line in response.iter_lines():
+                if not line.startswith(b"data: "):
+                    continue
+                data = json.loads(line[len(b"data: "):])
+                if data.get("content"):
+                    chunks.append(data["content"])
+                    callback(data["content"])
+                if data.get("stop"):
+                    break
+            return "".join(chunks)
+        except (OSError, ValueError, KeyError) as e:
+            self.logger.error(f"Error running inference with llama-server: {e}")
+            raise RuntimeError(f"Error running inference with llama-server: {e}")
+
+    def close(self) -> None:
+        """Stop the resident llama-server, if one is running."""
+        process = self._server_process
+        self._server_process = None
+        if process is None or process.poll() is not None:
+            return
+
+        process.terminate()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+    @contextmanager
+    def _llama_cli_command(self,
+                           llama_cli: str,
+                           model_path: str,
+                           prompt: str,
+                           n_predict: int,
+                           threads: int,
+                           ctx_size: int,
+                           temperature: float,
+                           conversation: bool) -> Iterator[List[str]]:
+        """Build the llama-cli argument list.
+
+        Arguments are passed as a list and never through a shell, so the
+        prompt needs no quoting. Prompts longer than config.PROMPT_ARG_LIMIT
+        are written to a temporary file passed with -f, which stays within
+        the OS command-line length limits; the file is removed afterwards.
+
+        Yields:
+            Command to pass to subprocess
+        """
+        # argv entries end at a NUL byte, which would silently truncate the prompt
+        if "\0" in prompt:
+            raise RuntimeError("Prompt must not contain NUL characters")
+
+        command = [
+            llama_cli,
+            '-m', model_path,
+            '-n', str(n_predict),
+            '-t', str(threads),
+            '-p', prompt,
+            '-ngl', '0',
+            '-c', str(ctx_size),
+            '--temp', str(temperature),
+            "-b", "1",
+        ]
+
+        if conversation:
+            command.append("-cnv")
+
+        if len(prompt) <= config.PROMPT_ARG_LIMIT:
+            yield command
+            return
+
+        fd, prompt_path = tempfile.mkstemp(suffix=".txt", prefix="bitnet-prompt-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(prompt)
+            prompt_index = command.index('-p')
+            command[prompt_index:prompt_index + 2] = ['-f', prompt_path]
+            yield command
+        finally:
+            os.remove(prompt_path)
 
     def run_inference(self,
                      model_name: str,
@@ -132,47 +336,74 @@ if __name__ == "__main__":
         if model_path is None:
             raise ValueError(f"Model {model_name} not found")
 
-        llama_cli = self._get_llama_cli_path()
+        llama_cli = self._llama_cli_path
 
         # Check if we're using the mock implementation
-        if llama_cli.endswith("mock_llama_cli.py"):
-            # For mock implementation, we need to handle the command differently
-            command_str = f"{llama_cli} -m {model_path} -n {n_predict} -t {threads} -p \"{prompt}\" -ngl 0 -c {ctx_size} --temp {temperature} -b 1"
-            if conversation:
-                command_str += " -cnv"
-
-            try:
-                result = subprocess.run(command_str, shell=True, capture_output=True, text=True, check=True)
-                return result.stdout
-            except subprocess.CalledProcessError as e:
-                self.logger.error(f"Error running inference with mock: {e}")
-                self.logger.error(f"stderr: {e.stderr}")
-                raise RuntimeError(f"Error running inference with mock: {e}")
+        if llama_cli == MOCK_LLAMA_CLI:
+            # Run the mock in-process instead of starting an interpreter for it
+            import mock_llama_cli
+
+            return "".join(mock_llama_cli.generate(prompt, conversation))
+        elif self._llama_server_path is not None:
+            # Output starts with the prompt, as llama-cli echoes it
+            return prompt + self._server_completion(model_path, prompt, n_predict, temperature)
         else:
             # For real implementation
-            command = [
-                llama_cli,
-                '-m', model_path,
-                '-n', str(n_predict),
-                '-t', str(threads),
-                '-p', prompt,
-                '-ngl', '0',
-                '-c', str(ctx_size),
-                '--temp', str(temperature),
-                "-b", "1",
-            ]
-
-            if conversation:
-                command.append("-cnv")
-
             try:
-                result = subprocess.run(command, capture_output=True, text=True, check=True)
+                with self._llama_cli_command(llama_cli, model_path, prompt, n_predict,
+                                             threads, ctx_size, temperature, conversation) as command:
+                    result = subprocess.run(command, capture_output=True, text=True, check=True)
                 return result.stdout
             except subprocess.CalledProcessError as e:
                 self.logger.error(f"Error running inference: {e}")
                 self.logger.error(f"stderr: {e.stderr}")
                 raise RuntimeError(f"Error running inference: {e}")
 
+    def run_inference_batch(self,
+                            model_name: str,
+                            prompts: List[str],
+                            n_predict: int = 128,
+                            threads: int = 4,
+                            ctx_size: int = 2048,
+                            temperature: float = 0.8,
+                            conversation: bool = False) -> List[str]:
+        """Run inference on several prompts with one model load.
+
+        With a resident llama-server the prompts are sent concurrently and
+        decoded together in its parallel slots; otherwise they run one after
+        another.
+
+        Args:
+            model_name: Name of the model to use
+            prompts: Prompts to generate text from
+            n_predict: Number of tokens to predict
+            threads: Number of threads to use
+            ctx_size: Context size
+            temperature: Temperature for sampling
+            conversation: Whether to use conversation mode
+
+        Returns:
+            Generated text for each prompt, in order
+        """
+        model_path = self.model_manager.get_model_path(model_name)
+        if model_path is None:
+            raise ValueError(f"Model {model_name} not found")
+
+        if self._llama_cli_path == MOCK_LLAMA_CLI or self._llama_server_path is None or len(prompts) < 2:
+            return [
+                self.run_inference(model_name, prompt, n_predict, threads, ctx_size, temperature, conversation)
+                for prompt in prompts
+            ]
+
+        # Load the model before fanning out so the requests don't queue on startup
+        self._ensure_server(model_path)
+
+        def complete(prompt: str) -> str:
+            return prompt + self._server_completion(model_path, prompt, n_predict, temperature)
+
+        with ThreadPoolExecutor(max_workers=min(len(prompts), config.LLAMA_SERVER_SLOTS)) as executor:
+            return list(executor.map(complete, prompts))
+
     def stream_inference(self,
                         model_name: str,
                         prompt: str,
@@ -198,89 +429,46 @@ if __name__ == "__main__":
         if model_path is None:
             raise ValueError(f"Model {model_name} not found")
 
-        llama_cli = self._get_llama_cli_path()
+        llama_cli = self._llama_cli_path
 
         # Check if we're using the mock implementation
-        if llama_cli.endswith("mock_llama_cli.py"):
-            # For mock implementation, we need to handle the command differently
-            command_str = f"{llama_cli} -m {model_path} -n {n_predict} -t {threads} -p \"{prompt}\" -ngl 0 -c {ctx_size} --temp {temperature} -b 1"
-            if conversation:
-                command_str += " -cnv"
+        if llama_cli == MOCK_LLAMA_CLI:
+            # Run the mock in-process instead of starting an interpreter for it
+            import mock_llama_cli
 
             try:
-                process = subprocess.Popen(
-                    command_str,
-                    shell=True,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True,
-                    bufsize=1
-                )
-
-                # Read stdout in a separate thread to avoid blocking
-                def read_stdout():
-                    for line in iter(process.stdout.readline, ''):
-                        callback(line)
-
-                stdout_thread = threading.Thread(target=read_stdout)
-                stdout_thread.daemon = True
-                stdout_thread.start()
-
-                # Wait for process to complete
-                process.wait()
-                stdout_thread.join()
-
-                if process.returncode != 0:
-                    stderr = process.stderr.read()
-                    self.logger.error(f"Error running inference with mock: {stderr}")
-                    raise RuntimeError(f"Error running inference with mock: {stderr}")
-
+                for chunk in mock_llama_cli.generate(prompt, conversation):
+                    callback(chunk)
             except Exception as e:
                 self.logger.error(f"Error streaming inference with mock: {e}")
                 raise RuntimeError(f"Error streaming inference with mock: {e}")
+        elif self._llama_server_path is not None:
+            # Output starts with the prompt, as llama-cli echoes it
+            callback(prompt)
+            self._server_completion(model_path, prompt, n_predict, temperature, callback)
         else:
             # For real implementation
-            command = [
-                llama_cli,
-                '-m', model_path,
-                '-n', str(n_predict),
-                '-t', str(threads),
-                '-p', prompt,
-                '-ngl', '0',
-                '-c', str(ctx_size),
-                '--temp', str(temperature),
-                "-b", "1",
-            ]
-
-            if conversation:
-                command.append("-cnv")
-
             try:
-                process = subprocess.Popen(
-                    command,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True,
-                    bufsize=1
-                )
-
-                # Read stdout in a separate thread to avoid blocking
-                def read_stdout():
-                    for line in iter(process.stdout.readline, ''):
-                        callback(line)
-
-                stdout_thread = threading.Thread(target=read_stdout)
-                stdout_thread.daemon = True
-                stdout_thread.start()
-
-                # Wait for process to complete
-                process.wait()
-                stdout_thread.join()
-
-                if process.returncode != 0:
-                    stderr = process.stderr.read()
-                    self.logger.error(f"Error running inference: {stderr}")
-                    raise RuntimeError(f"Error running inference: {stderr}")
+                with self._llama_cli_command(llama_cli, model_path, prompt, n_predict,
+                                             threads, ctx_size, temperature, conversation) as command:
+                    # stderr goes to a file so llama-cli's logging can't fill a pipe nobody reads
+                    with tempfile.TemporaryFile() as stderr_file:
+                        with subprocess.Popen(
+                            command,
+                            stdout=subprocess.PIPE,
+                            stderr=stderr_file,
+                            text=True,
+                            bufsize=1
+                        ) as process:
+                            # Hand each line to the callback as soon as it is printed
+                            for line in process.stdout:
+                                callback(line)
+
+                        if process.returncode != 0:
+                            stderr_file.seek(0)
+                            stderr = stderr_file.read().decode(errors="replace")
+                            self.logger.error(f"Error running inference: {stderr}")
+                            raise RuntimeError(f"Error running inference: {stderr}")
 
             except Exception as e:
                 self.logger.error(f"Error streaming inference: {e}")
@@ -307,20 +495,7 @@ if __name__ == "__main__":
             Dictionary with completion information
         """
         # Format messages into a prompt
-        prompt = ""
-        for message in messages:
-            role = message["role"]
-            content = message["content"]
-
-            if role == "system":
-                prompt += f"System: {content}\n\n"
-            elif role == "user":
-                prompt += f"User: {content}\n\n"
-            elif role == "assistant":
-                prompt += f"Assistant: {content}\n\n"
-
-        # Add final assistant prompt
-        prompt += "Assistant: "
+        prompt = format_chat_prompt(messages)
 
         # Run inference
         response = self.run_inference(
@@ -339,7 +514,7 @@ if __name__ == "__main__":
         return {
             "id": "chat-" + model_name,
             "object": "chat.completion",
-            "created": int(import_time()),
+            "created": int(_now()),
             "model": model_name,
             "choices": [
                 {
@@ -373,52 +548,58 @@ if __name__ == "__main__":
             temperature: Temperature for sampling
         """
         # Format messages into a prompt
-        prompt = ""
-        for message in messages:
-            role = message["role"]
-            content = message["content"]
-
-            if role == "system":
-                prompt += f"System: {content}\n\n"
-            elif role == "user":
-                prompt += f"User: {content}\n\n"
-            elif role == "assistant":
-                prompt += f"Assistant: {content}\n\n"
-
-        # Add final assistant prompt
-        prompt += "Assistant: "
-
-        # Buffer for collecting response
-        response_buffer = ""
+        prompt = format_chat_prompt(messages)
+
+        # llama-cli echoes the prompt first. Output is held back only until the
+        # echo is complete; the part after its last "Assistant: " marker and
+        # every later chunk are forwarded as they arrive.
+        echo = {"parts": [], "length": 0, "done": False}
+
+        def release_echo() -> str:
+            """Stop holding output back and return the reply text buffered so far."""
+            buffered = "".join(echo["parts"])
+            echo["parts"] = None
+            echo["done"] = True
+
+            marker = buffered.rfind("Assistant: ")
+            if marker != -1:
+                buffered = buffered[marker + len("Assistant: "):]
+            return buffered.lstrip()
+
+        def send(content: str):
+            # Create response object
+            response = {
+                "id": "chat-" + model_name,
+                "object": "chat.completion.chunk",
+                "created": int(_now()),
+                "model": model_name,
+                "choices": [
+                    {
+                        "index": 0,
+                        "delta": {
+                            "role": "assistant",
+                            "content": content
+                        },
+                        "finish_reason": None
+                    }
+                ]
+            }
+
+            callback(response)
 
         # Callback for streaming
         def stream_callback(chunk: str):
-            nonlocal response_buffer
-            response_buffer += chunk
-
-            # Extract assistant response
-            if "Assistant: " in response_buffer:
-                assistant_response = response_buffer.split("Assistant: ")[-1].strip()
-
-                # Create response object
-                response = {
-                    "id": "chat-" + model_name,
-                    "object": "chat.completion.chunk",
-                    "created": int(import_time()),
-                    "model": model_name,
-                    "choices": [
-                        {
-                            "index": 0,
-                            "delta": {
-                                "role": "assistant",
-                                "content": chunk
-                            },
-                            "finish_reason": None
-                        }
-                    ]
-                }
+            if not echo["done"]:
+                echo["parts"].append(chunk)
+                echo["length"] += len(chunk)
+                if echo["length"] < len(prompt):
+                    return
+
+                chunk = release_echo()
+                if not chunk:
+                    return
 
-                callback(response)
+            send(chunk)
 
         # Run streaming inference
         self.stream_inference(
@@ -432,11 +613,18 @@ if __name__ == "__main__":
             conversation=True
         )
 
+        # Output shorter than the prompt, e.g. an echo detokenised differently or
+        # none at all, is still held back; send the reply it contains
+        if not echo["done"]:
+            chunk = release_echo()
+            if chunk:
+                send(chunk)
+
         # Send final chunk with finish_reason
         final_response = {
             "id": "chat-" + model_name,
             "object": "chat.completion.chunk",
-            "created": int(import_time()),
+            "created": int(_now()),
             "model": model_name,
             "choices": [
                 {
@@ -448,8 +636,3 @@ if __name__ == "__main__":
         }
 
         callback(final_response)
-
-# Helper function to get current time
-def import_time():
-    import time
-    return time.time()
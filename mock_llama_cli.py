@@ -3,10 +3,58 @@
 Mock implementation of llama-cli for testing BitNet.cpp application.
 This script simulates the behavior of the llama-cli binary for development and testing.
 """
+import os
 import sys
 import time
 import random
 import argparse
+from typing import Iterator
+
+# Canned responses, plus extra ones used in conversation mode
+RESPONSES = [
+    "I'm a BitNet model running in mock mode. I can't provide real responses yet.",
+    "This is a placeholder response from the mock llama-cli implementation.",
+    "When the real BitNet.cpp integration is complete, you'll see actual model outputs here.",
+    "For now, I'm just generating random text to simulate a response."
+]
+CONVERSATION_RESPONSES = [
+    "In conversation mode, I would maintain context between messages.",
+    "The real BitNet models will be able to have coherent conversations.",
+    "This is just a simulation of the conversation mode."
+]
+
+def generate(prompt: str = "", conversation: bool = False) -> Iterator[str]:
+    """Generate mock llama-cli output without starting a process.
+
+    The response comes out at once unless BITNET_MOCK_CHAR_DELAY sets a delay
+    in seconds, in which case it is streamed a character at a time after a
+    one second "thinking" pause.
+
+    Args:
+        prompt: Prompt to echo, as llama-cli does
+        conversation: Whether to use conversation mode
+
+    Yields:
+        Chunks of output text: the echoed prompt line, then the response
+    """
+    # Echo the prompt first (this simulates how llama-cli would echo the prompt)
+    yield prompt + "\n"
+    
+    responses = RESPONSES + CONVERSATION_RESPONSES if conversation else RESPONSES
+    
+    response = random.choice(responses)
+    
+    delay = float(os.environ.get("BITNET_MOCK_CHAR_DELAY", "0"))
+    if delay <= 0:
+        yield response + "\n"
+        return
+    
+    # Stream the response character by character, with some delay to simulate thinking
+    time.sleep(1)
+    for char in response:
+        yield char
+        time.sleep(delay)
+    yield "\n"
 
 def main():
     """Mock implementation of llama-cli for testing."""
@@ -22,49 +70,14 @@ def main():
     parser.add_argument("-b", "--batch-size", type=int, default=1, help="Batch size")
     parser.add_argument("-cnv", "--conversation", action="store_true", help="Conversation mode")
     
-    # Parse args or use sys.argv directly if parsing fails
-    try:
-        args = parser.parse_args()
-        prompt = args.prompt
-        conversation = args.conversation
-    except:
-        # Fallback to manual parsing
-        prompt = ""
-        conversation = False
-        for i, arg in enumerate(sys.argv):
-            if arg == "-p" and i + 1 < len(sys.argv):
-                prompt = sys.argv[i + 1]
-            if arg == "-cnv":
-                conversation = True
-    
-    # Print the prompt first (this simulates how llama-cli would echo the prompt)
-    print(prompt)
-    
-    # Generate some mock response
-    responses = [
-        "I'm a BitNet model running in mock mode. I can't provide real responses yet.",
-        "This is a placeholder response from the mock llama-cli implementation.",
-        "When the real BitNet.cpp integration is complete, you'll see actual model outputs here.",
-        "For now, I'm just generating random text to simulate a response."
-    ]
-    
-    # Add conversation-specific responses
-    if conversation:
-        responses.extend([
-            "In conversation mode, I would maintain context between messages.",
-            "The real BitNet models will be able to have coherent conversations.",
-            "This is just a simulation of the conversation mode."
-        ])
+    # Ignore llama-cli flags the mock doesn't know about
+    args, _ = parser.parse_known_args()
     
-    # Print the response with some delay to simulate thinking
-    time.sleep(1)
-    response = random.choice(responses)
-    
-    # Stream the response character by character
-    for char in response:
-        print(char, end="", flush=True)
-        time.sleep(0.01)
-    print()
+    # Write UTF-8 bytes directly, skipping the text layer's per-call encoding
+    out = sys.stdout.buffer
+    for chunk in generate(args.prompt, args.conversation):
+        out.write(chunk.encode("utf-8"))
+        out.flush()
 
 if __name__ == "__main__":
     main()
@@ -7,14 +7,53 @@ import os
 import sys
 import json
 import logging
-import platform
 import subprocess
 import shutil
+import tempfile
+import threading
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Any
 
 import config
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Version of the registry.json layout; registries written in another layout are discarded
+REGISTRY_VERSION = 1
+
+# Directories searched for llama.cpp binaries, in order (MSVC builds go to Release)
+BUILD_BIN_DIRS = (os.path.join("build", "bin", "Release"), os.path.join("build", "bin"))
+
+@lru_cache(maxsize=1)
+def _list_build_binaries() -> Dict[str, str]:
+    """Scan the build directories once, mapping binary names to their paths."""
+    binaries = {}
+    for bin_dir in reversed(BUILD_BIN_DIRS):
+        try:
+            with os.scandir(bin_dir) as entries:
+                for entry in entries:
+                    name, ext = os.path.splitext(entry.name)
+                    if ext in ("", ".exe") and entry.is_file():
+                        binaries[name] = entry.path
+        except OSError:
+            pass
+    return binaries
+
+def find_build_binary(name: str) -> Optional[str]:
+    """Get the path to a llama.cpp binary such as llama-cli, or None if it is not built.
+
+    Args:
+        name: Binary name without extension
+
+    Returns:
+        Path to the binary, preferring build/bin/Release on Windows builds
+    """
+    return _list_build_binaries().get(name)
+
 class ModelManager:
     def __init__(self, models_dir: str = config.MODELS_DIR, logs_dir: str = config.LOGS_DIR):
         """Initialize the model manager.
@@ -32,43 +71,82 @@ class ModelManager:
 
         # Initialize model registry
         self.registry_path = os.path.join(self.models_dir, "registry.json")
+        self._registry_mtime = self._get_registry_mtime()
         self.registry = self._load_registry()
+        self._dirty = False
 
-        # Get system information
-        self.system, self.arch = self._get_system_info()
-
-        # Set up logging
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(os.path.join(self.logs_dir, "model_manager.log")),
-                logging.StreamHandler()
-            ]
-        )
+        # Serializes registry updates from concurrent downloads and removals
+        self._registry_lock = threading.Lock()
+
+        # Set up logging, attaching handlers only for the first instance
         self.logger = logging.getLogger("model_manager")
+        if not self.logger.handlers:
+            formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+            for handler in (logging.FileHandler(os.path.join(self.logs_dir, "model_manager.log")),
+                            logging.StreamHandler()):
+                handler.setFormatter(formatter)
+                self.logger.addHandler(handler)
+            self.logger.setLevel(logging.INFO)
+            self.logger.propagate = False
+
+    def _get_registry_mtime(self) -> Optional[int]:
+        """Get registry.json's modification time in nanoseconds, or None if it doesn't exist."""
+        try:
+            return os.stat(self.registry_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _refresh_registry(self) -> None:
+        """Reload the registry if another process rewrote registry.json.
 
-    def _get_system_info(self) -> Tuple[str, str]:
-        """Get system and architecture information."""
-        system = platform.system()
-        machine = platform.machine()
-        arch = config.ARCH_ALIAS.get(machine, machine)
-        return system, arch
+        Costs one stat call; the file is only read again when its
+        modification time changed.
+        """
+        mtime = self._get_registry_mtime()
+        if mtime != self._registry_mtime:
+            self._registry_mtime = mtime
+            self.registry = self._load_registry()
 
     def _load_registry(self) -> Dict[str, Any]:
         """Load the model registry from disk."""
         if os.path.exists(self.registry_path):
             try:
-                with open(self.registry_path, 'r') as f:
-                    return json.load(f)
-            except json.JSONDecodeError:
-                return {"models": {}}
-        return {"models": {}}
+                with open(self.registry_path, 'rb') as f:
+                    registry = json.loads(f.read())
+            except ValueError:
+                return {"version": REGISTRY_VERSION, "models": {}}
+
+            # Registries from before versioning share the current layout
+            if registry.get("version", REGISTRY_VERSION) == REGISTRY_VERSION and "models" in registry:
+                registry["version"] = REGISTRY_VERSION
+                return registry
+        return {"version": REGISTRY_VERSION, "models": {}}
 
     def _save_registry(self) -> None:
-        """Save the model registry to disk."""
-        with open(self.registry_path, 'w') as f:
-            json.dump(self.registry, f, indent=2)
+        """Save the model registry to disk if it changed.
+
+        The registry is written to a uniquely named temporary file and moved
+        into place, so a crash mid-write never leaves a truncated registry.json
+        behind and concurrent writers never share a temporary file.
+        """
+        if not self._dirty:
+            return
+
+        if orjson is not None:
+            data = orjson.dumps(self.registry, option=orjson.OPT_INDENT_2)
+        else:
+            data = json.dumps(self.registry, indent=2).encode()
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.models_dir, prefix="registry-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self.registry_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        self._registry_mtime = self._get_registry_mtime()
+        self._dirty = False
 
     def _run_command(self, command: List[str], shell: bool = False, log_step: Optional[str] = None) -> bool:
         """Run a system command and ensure it succeeds.
@@ -98,20 +176,89 @@ class ModelManager:
                 self.logger.error(f"Error occurred while running command: {e}")
                 return False
 
+    def _download_files(self, model_id: str, model_dir: str, workers: int) -> bool:
+        """Download a model repository's files into model_dir.
+
+        Uses huggingface_hub in-process to fetch files in parallel.
+
+        Args:
+            model_id: Hugging Face model ID
+            model_dir: Directory to download into
+            workers: Number of files to download concurrently
+
+        Returns:
+            True if download succeeded, False otherwise
+        """
+        from huggingface_hub import snapshot_download
+        from huggingface_hub.utils import HfHubHTTPError
+
+        try:
+            snapshot_download(repo_id=model_id, local_dir=model_dir, max_workers=workers)
+        except HfHubHTTPError as e:
+            self.logger.error(f"Error downloading model {model_id}: {e}")
+            return False
+
+        return True
+
+    def _convert_to_gguf(self, model_dir: str, model_name: str, quant_type: str, gguf_path: str) -> Optional[bool]:
+        """Convert a downloaded model to GGUF with BitNet.cpp's tools.
+
+        tl1 and tl2 files are written directly by the converter; i2_s goes
+        through an f32 GGUF that llama-quantize packs, as in BitNet.cpp's
+        setup_env.py.
+
+        Args:
+            model_dir: Directory holding the downloaded model
+            model_name: Name of the model, used for the log files
+            quant_type: Quantization type (i2_s, tl1, tl2)
+            gguf_path: Path of the GGUF file to produce
+
+        Returns:
+            True if conversion succeeded, False if it failed, None if the tools are not available
+        """
+        converter = os.path.join(config.BITNET_DIR, "utils", "convert-hf-to-gguf-bitnet.py")
+        if not os.path.exists(converter):
+            return None
+
+        if quant_type.startswith("tl"):
+            return self._run_command(
+                [sys.executable, converter, model_dir, "--outtype", quant_type, "--quant-embd"],
+                log_step=f"convert_model_{model_name}"
+            )
+
+        quantize_path = find_build_binary("llama-quantize")
+        if quantize_path is None:
+            return None
+
+        f32_path = os.path.join(model_dir, "ggml-model-f32.gguf")
+        return (
+            self._run_command(
+                [sys.executable, converter, model_dir, "--outtype", "f32"],
+                log_step=f"convert_model_{model_name}"
+            )
+            and self._run_command(
+                [quantize_path, f32_path, gguf_path, "I2_S", "1"],
+                log_step=f"quantize_model_{model_name}"
+            )
+        )
+
     def list_available_models(self) -> Dict[str, Dict[str, str]]:
         """List all available models from Hugging Face."""
         return config.SUPPORTED_MODELS
 
     def list_installed_models(self) -> Dict[str, Dict[str, Any]]:
         """List all installed models."""
+        self._refresh_registry()
         return self.registry["models"]
 
-    def download_model(self, model_id: str, quant_type: Optional[str] = None) -> bool:
+    def download_model(self, model_id: str, quant_type: Optional[str] = None,
+                       workers: int = config.DOWNLOAD_WORKERS) -> bool:
         """Download a model from Hugging Face.
 
         Args:
             model_id: Hugging Face model ID
             quant_type: Quantization type (i2_s, tl1, tl2)
+            workers: Number of files to download concurrently
 
         Returns:
             True if download succeeded, False otherwise
@@ -122,12 +269,16 @@ class ModelManager:
 
         # Determine quantization type if not provided
         if quant_type is None:
-            quant_type = config.SUPPORTED_QUANT_TYPES[self.arch][0]
+            quant_type = config.DEFAULT_QUANT_TYPES[config.ARCH]
 
-        if quant_type not in config.SUPPORTED_QUANT_TYPES[self.arch]:
-            self.logger.error(f"Quantization type {quant_type} is not supported on {self.arch}")
+        if quant_type not in config.SUPPORTED_QUANT_TYPES[config.ARCH]:
+            self.logger.error(f"Quantization type {quant_type} is not supported on {config.ARCH}")
             return False
 
+        # BitNet.cpp commit 112f853 broke i2_s on ARM (garbled output); 404980e is the last good one
+        if quant_type == "i2_s" and config.ARCH == "arm64":
+            self.logger.warning("i2_s produces garbled output on ARM with BitNet.cpp builds after commit 112f853; tl1 is recommended")
+
         model_name = config.SUPPORTED_MODELS[model_id]["model_name"]
         model_dir = os.path.join(self.models_dir, model_name)
 
@@ -137,25 +288,27 @@ class ModelManager:
         # Download model
         self.logger.info(f"Downloading model {model_id} from Hugging Face to {model_dir}...")
         try:
-            if not self._run_command(
-                ["huggingface-cli", "download", model_id, "--local-dir", model_dir],
-                log_step=f"download_model_{model_name}"
-            ):
+            if not self._download_files(model_id, model_dir, workers):
                 return False
         except Exception as e:
             self.logger.error(f"Error downloading model: {e}")
             return False
 
-        # Create a placeholder GGUF file for now
-        # In a real implementation, this would convert the model to GGUF format
+        # Convert to GGUF in the requested quantization, which llama-cli loads as-is
         gguf_path = os.path.join(model_dir, f"ggml-model-{quant_type}.gguf")
         if not os.path.exists(gguf_path):
-            with open(gguf_path, "w") as f:
-                f.write("# Placeholder GGUF file")
-            self.logger.info(f"Created placeholder GGUF file at {gguf_path}")
-
-        # Update registry
-        self.registry["models"][model_name] = {
+            self.logger.info(f"Converting model {model_name} to {quant_type} GGUF...")
+            converted = self._convert_to_gguf(model_dir, model_name, quant_type, gguf_path)
+            if converted is False:
+                return False
+            if converted is None:
+                # Create a placeholder GGUF file when BitNet.cpp's tools are not available
+                with open(gguf_path, "w") as f:
+                    f.write("# Placeholder GGUF file")
+                self.logger.info(f"Created placeholder GGUF file at {gguf_path}")
+
+        # Update registry, starting from any changes made by other processes
+        model_info = {
             "model_id": model_id,
             "model_name": model_name,
             "quant_type": quant_type,
@@ -163,7 +316,12 @@ class ModelManager:
             "gguf_path": gguf_path,
             "description": config.SUPPORTED_MODELS[model_id]["description"]
         }
-        self._save_registry()
+        with self._registry_lock:
+            self._refresh_registry()
+            if self.registry["models"].get(model_name) != model_info:
+                self.registry["models"][model_name] = model_info
+                self._dirty = True
+            self._save_registry()
 
         self.logger.info(f"Model {model_name} downloaded and set up successfully")
         return True
@@ -177,6 +335,7 @@ class ModelManager:
         Returns:
             True if removal succeeded, False otherwise
         """
+        self._refresh_registry()
         if model_name not in self.registry["models"]:
             self.logger.error(f"Model {model_name} is not installed")
             return False
@@ -190,9 +349,12 @@ class ModelManager:
             self.logger.error(f"Error removing model directory: {e}")
             return False
 
-        # Update registry
-        del self.registry["models"][model_name]
-        self._save_registry()
+        # Update registry, starting from any changes made by other processes
+        with self._registry_lock:
+            self._refresh_registry()
+            if self.registry["models"].pop(model_name, None) is not None:
+                self._dirty = True
+            self._save_registry()
 
         self.logger.info(f"Model {model_name} removed successfully")
         return True
@@ -206,6 +368,7 @@ class ModelManager:
         Returns:
             Path to the model's GGUF file, or None if not found
         """
+        self._refresh_registry()
         if model_name not in self.registry["models"]:
             return None
 
@@ -220,6 +383,7 @@ class ModelManager:
         Returns:
             Dictionary with model information, or None if not found
         """
+        self._refresh_registry()
         if model_name not in self.registry["models"]:
             return None
 
@@ -5,46 +5,75 @@ All processing is done locally on the user's machine without requiring any cloud
 """
 import os
 import json
+import time
+import uuid
+import asyncio
+import hashlib
 import logging
-from typing import Dict, List, Optional, Any
+from logging.handlers import RotatingFileHandler, MemoryHandler
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, AsyncIterator, Callable, Tuple
 
 import uvicorn
 from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
-from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi.responses import StreamingResponse, JSONResponse, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from pydantic import BaseModel, Field
+from typing_extensions import TypedDict
 
 import config
 from model_manager import ModelManager
 from inference import InferenceEngine
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Serialize responses with orjson when it is installed
+ResponseClass = ORJSONResponse if orjson is not None else JSONResponse
+
 # Create FastAPI app
 app = FastAPI(
     title="BitNet.cpp API",
     description="API for BitNet.cpp models",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ResponseClass
 )
 
-# Add CORS middleware
+# Add CORS middleware; browsers reject credentials for a wildcard origin,
+# so they are only allowed for an explicit origin list
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
+    allow_origins=config.CORS_ORIGINS,
+    allow_credentials="*" not in config.CORS_ORIGINS,
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
+# Compress larger JSON responses; event streams opt out with STREAM_HEADERS
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # Create model manager and inference engine
 model_manager = ModelManager()
 inference_engine = InferenceEngine(model_manager)
 
-# Set up logging
+# Set up logging; server.log is rotated at 10 MB and written in batches,
+# flushed early only for errors
+log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+log_file_handler = RotatingFileHandler(
+    os.path.join(config.LOGS_DIR, "server.log"),
+    maxBytes=10_000_000,
+    backupCount=3
+)
+log_file_handler.setFormatter(logging.Formatter(log_format))
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    format=log_format,
     handlers=[
-        logging.FileHandler(os.path.join(config.LOGS_DIR, "server.log")),
+        MemoryHandler(100, flushLevel=logging.ERROR, target=log_file_handler),
         logging.StreamHandler()
     ]
 )
@@ -57,6 +86,7 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 class ModelInfo(BaseModel):
     model_id: str
     quant_type: Optional[str] = None
+    workers: int = Field(config.DOWNLOAD_WORKERS, ge=1)
 
 class InferenceRequest(BaseModel):
     model: str
@@ -67,7 +97,17 @@ class InferenceRequest(BaseModel):
     temperature: float = 0.8
     conversation: bool = False
 
-class Message(BaseModel):
+class BatchInferenceRequest(BaseModel):
+    model: str
+    prompts: List[str]
+    n_predict: int = 128
+    threads: int = 4
+    ctx_size: int = 2048
+    temperature: float = 0.8
+    conversation: bool = False
+
+# Validated as plain dicts, so messages reach the inference engine without copying
+class Message(TypedDict):
     role: str
     content: str
 
@@ -80,6 +120,105 @@ class ChatCompletionRequest(BaseModel):
     temperature: float = 0.8
     stream: bool = False
 
+# Conversation histories of recent chat completions, keyed by the session ID
+# returned in the X-Chat-Session header, so clients can send only new messages
+chat_sessions: "OrderedDict[str, List[Dict[str, str]]]" = OrderedDict()
+
+def create_chat_session(messages: List[Dict[str, str]]) -> str:
+    """Store a conversation history and return its session ID."""
+    session_id = uuid.uuid4().hex
+    chat_sessions[session_id] = messages
+    while len(chat_sessions) > config.CHAT_SESSION_LIMIT:
+        chat_sessions.popitem(last=False)
+    return session_id
+
+class ResponseCache:
+    """Bounded LRU cache of responses that expire after a fixed time to live."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    @staticmethod
+    def key(*parts: Any) -> str:
+        """Hash JSON-serializable request parameters into a cache key."""
+        data = json.dumps(parts, sort_keys=True).encode("utf-8")
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached response for key, or None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires, value = entry
+        if expires < time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: Any):
+        """Cache a response, evicting the least recently used ones over the limit."""
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all cached responses."""
+        self._entries.clear()
+
+# Responses to deterministic requests, so retries skip inference entirely
+response_cache = ResponseCache(config.RESPONSE_CACHE_SIZE, config.RESPONSE_CACHE_TTL)
+
+# Event that ends every stream
+SSE_DONE = b"data: [DONE]\n\n"
+
+# Headers of event streams; an explicit encoding keeps GZipMiddleware from
+# buffering events inside its compressor
+STREAM_HEADERS = {"Content-Encoding": "identity", "Cache-Control": "no-cache"}
+
+def sse_event(data: Any) -> bytes:
+    """Format data as a server-sent event, using orjson when it is installed.
+
+    The event is built as bytes, which StreamingResponse sends without re-encoding.
+    """
+    payload = orjson.dumps(data) if orjson is not None else json.dumps(data).encode("utf-8")
+    return b"".join((b"data: ", payload, b"\n\n"))
+
+async def stream_from_thread(run: Callable[..., None], **kwargs) -> AsyncIterator[Any]:
+    """Run a blocking streaming call in a worker thread and yield each item it produces.
+
+    run is called with the keyword arguments plus a callback, which hands
+    each item to this generator as soon as it is produced. An exception
+    raised by run is re-raised once the items before it have been yielded.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    done = object()
+
+    def callback(item: Any) -> None:
+        loop.call_soon_threadsafe(queue.put_nowait, item)
+
+    future = loop.run_in_executor(None, lambda: run(callback=callback, **kwargs))
+    future.add_done_callback(lambda _: queue.put_nowait(done))
+
+    while True:
+        item = await queue.get()
+        if item is done:
+            break
+        yield item
+
+    future.result()
+
+@app.on_event("shutdown")
+def shutdown():
+    """Stop this worker's llama-server, if one was started."""
+    inference_engine.close()
+
 # Define API endpoints
 @app.get("/")
 async def root():
@@ -103,7 +242,8 @@ async def download_model(model_info: ModelInfo, background_tasks: BackgroundTask
     background_tasks.add_task(
         model_manager.download_model,
         model_info.model_id,
-        model_info.quant_type
+        model_info.quant_type,
+        model_info.workers
     )
 
     return {
@@ -117,6 +257,9 @@ async def remove_model(model_name: str):
     if not success:
         raise HTTPException(status_code=404, detail=f"Model {model_name} not found")
 
+    # A model downloaded again under the same name must not serve stale responses
+    response_cache.clear()
+
     return {"message": f"Model {model_name} removed successfully"}
 
 @app.get("/models/{model_name}")
@@ -131,6 +274,14 @@ async def get_model_info(model_name: str):
 @app.post("/inference")
 async def run_inference(request: InferenceRequest):
     """Run inference on a model."""
+    # Only greedy sampling is deterministic, so only then can a response be reused
+    cache_key = None
+    if request.temperature == 0:
+        cache_key = response_cache.key("inference", request.model_dump())
+        response = response_cache.get(cache_key)
+        if response is not None:
+            return {"response": response}
+
     try:
         response = inference_engine.run_inference(
             model_name=request.model,
@@ -142,88 +293,137 @@ async def run_inference(request: InferenceRequest):
             conversation=request.conversation
         )
 
+        if cache_key is not None:
+            response_cache.put(cache_key, response)
+
         return {"response": response}
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except RuntimeError as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/inference/stream")
-async def stream_inference(request: InferenceRequest):
-    """Stream inference results from a model."""
+@app.post("/inference/batch")
+def run_batch_inference(request: BatchInferenceRequest):
+    """Run inference on several prompts, returning the responses in order."""
+    # A plain def runs in FastAPI's threadpool, so a long batch (or llama-server
+    # loading the model) does not hold up the event loop and other requests
     try:
-        async def generate():
-            # Create generator for streaming response
-            queue = []
+        responses = inference_engine.run_inference_batch(
+            model_name=request.model,
+            prompts=request.prompts,
+            n_predict=request.n_predict,
+            threads=request.threads,
+            ctx_size=request.ctx_size,
+            temperature=request.temperature,
+            conversation=request.conversation
+        )
 
-            def callback(chunk: str):
-                queue.append(chunk)
+        return {"responses": responses}
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-            # Start inference in background
-            inference_engine.stream_inference(
+@app.post("/inference/stream")
+async def stream_inference(request: InferenceRequest):
+    """Stream inference results from a model."""
+    # Check the model up front; once streaming starts the status code is already sent
+    if model_manager.get_model_path(request.model) is None:
+        raise HTTPException(status_code=404, detail=f"Model {request.model} not found")
+
+    async def generate():
+        try:
+            async for chunk in stream_from_thread(
+                inference_engine.stream_inference,
                 model_name=request.model,
                 prompt=request.prompt,
-                callback=callback,
                 n_predict=request.n_predict,
                 threads=request.threads,
                 ctx_size=request.ctx_size,
                 temperature=request.temperature,
                 conversation=request.conversation
-            )
+            ):
+                yield sse_event({"response": chunk})
+        except (ValueError, RuntimeError) as e:
+            logger.error(f"Error streaming inference: {e}")
+            yield sse_event({"error": str(e)})
 
-            # Stream results
-            while True:
-                if queue:
-                    chunk = queue.pop(0)
-                    yield f"data: {json.dumps({'response': chunk})}\n\n"
-                else:
-                    break
+        # End stream
+        yield SSE_DONE
 
-            # End stream
-            yield "data: [DONE]\n\n"
-
-        return StreamingResponse(generate(), media_type="text/event-stream")
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
-    except RuntimeError as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return StreamingResponse(generate(), media_type="text/event-stream", headers=STREAM_HEADERS)
 
 @app.post("/chat/completions")
 async def chat_completions(request: ChatCompletionRequest):
     """Generate a chat completion."""
+    messages = request.messages
+    return complete_chat(request, messages, create_chat_session(messages))
+
+@app.post("/chat/session/{session_id}/append")
+async def append_chat_session(session_id: str, request: ChatCompletionRequest):
+    """Generate a chat completion for a stored conversation extended by new messages."""
+    messages = chat_sessions.get(session_id)
+    if messages is None:
+        raise HTTPException(status_code=404, detail=f"Chat session {session_id} not found")
+
+    chat_sessions.move_to_end(session_id)
+    messages.extend(request.messages)
+    return complete_chat(request, messages, session_id)
+
+def complete_chat(request: ChatCompletionRequest, messages: List[Dict[str, str]], session_id: str):
+    """Run a chat completion over messages and tag the response with its session ID."""
+    headers = {"X-Chat-Session": session_id}
     try:
         if request.stream:
+            # Check the model up front; once streaming starts the status code is already sent
+            if model_manager.get_model_path(request.model) is None:
+                raise ValueError(f"Model {request.model} not found")
+
             async def generate():
-                # Create generator for streaming response
-                def callback(response: Dict[str, Any]):
-                    yield f"data: {json.dumps(response)}\n\n"
-
-                # Start inference in background
-                inference_engine.stream_chat_completion(
-                    model_name=request.model,
-                    messages=[msg.dict() for msg in request.messages],
-                    callback=callback,
-                    n_predict=request.n_predict,
-                    threads=request.threads,
-                    ctx_size=request.ctx_size,
-                    temperature=request.temperature
-                )
+                try:
+                    async for response in stream_from_thread(
+                        inference_engine.stream_chat_completion,
+                        model_name=request.model,
+                        messages=messages,
+                        n_predict=request.n_predict,
+                        threads=request.threads,
+                        ctx_size=request.ctx_size,
+                        temperature=request.temperature
+                    ):
+                        yield sse_event(response)
+                except (ValueError, RuntimeError) as e:
+                    logger.error(f"Error streaming chat completion: {e}")
+                    yield sse_event({"error": str(e)})
 
                 # End stream
-                yield "data: [DONE]\n\n"
+                yield SSE_DONE
 
-            return StreamingResponse(generate(), media_type="text/event-stream")
+            return StreamingResponse(generate(), media_type="text/event-stream", headers={**STREAM_HEADERS, **headers})
         else:
+            # Only greedy sampling is deterministic, so only then can a response be reused
+            cache_key = None
+            if request.temperature == 0:
+                cache_key = response_cache.key(
+                    "chat", request.model, messages,
+                    request.n_predict, request.threads, request.ctx_size
+                )
+                response = response_cache.get(cache_key)
+                if response is not None:
+                    return ResponseClass(content=response, headers=headers)
+
             response = inference_engine.chat_completion(
                 model_name=request.model,
-                messages=[msg.dict() for msg in request.messages],
+                messages=messages,
                 n_predict=request.n_predict,
                 threads=request.threads,
                 ctx_size=request.ctx_size,
                 temperature=request.temperature
             )
 
-            return response
+            if cache_key is not None:
+                response_cache.put(cache_key, response)
+
+            return ResponseClass(content=response, headers=headers)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except RuntimeError as e:
@@ -231,9 +431,10 @@ async def chat_completions(request: ChatCompletionRequest):
 
 # Run server
 if __name__ == "__main__":
+    # Each worker process imports the app and loads its own models, sessions and cache
     uvicorn.run(
         "server:app",
         host=config.API_HOST,
         port=config.API_PORT,
-        reload=True
+        workers=config.API_WORKERS
     )
@@ -7,10 +7,10 @@ import os
 import sys
 import json
 import logging
-import platform
 import subprocess
 import shutil
 import argparse
+import tempfile
 from pathlib import Path
 
 # Configure logging
@@ -61,22 +61,7 @@ def get_system_info():
     Returns:
         Tuple of (system, architecture)
     """
-    system = platform.system()
-    machine = platform.machine()
-    
-    # Map architecture aliases
-    arch_aliases = {
-        "AMD64": "x86_64",
-        "x86": "x86_64",
-        "x86_64": "x86_64",
-        "aarch64": "arm64",
-        "arm64": "arm64",
-        "ARM64": "arm64",
-    }
-    
-    arch = arch_aliases.get(machine, machine)
-    
-    return system, arch
+    return config.SYSTEM, config.ARCH
 
 def download_model(model_id, model_dir, quant_type=None):
     """Download a model from Hugging Face.
@@ -98,7 +83,7 @@ def download_model(model_id, model_dir, quant_type=None):
     
     # Determine quantization type if not provided
     if quant_type is None:
-        quant_type = config.SUPPORTED_QUANT_TYPES[arch][0]
+        quant_type = config.DEFAULT_QUANT_TYPES[arch]
     
     if quant_type not in config.SUPPORTED_QUANT_TYPES[arch]:
         logger.error(f"Quantization type {quant_type} is not supported on {arch}")
@@ -110,12 +95,18 @@ def download_model(model_id, model_dir, quant_type=None):
     # Create model directory
     Path(model_path).mkdir(parents=True, exist_ok=True)
     
-    # Download model
+    # Download model in-process so files are fetched in parallel over one connection pool
+    from huggingface_hub import snapshot_download
+    from huggingface_hub.utils import HfHubHTTPError
+    
     logger.info(f"Downloading model {model_id} from Hugging Face to {model_path}...")
-    if not run_command(
-        ["huggingface-cli", "download", model_id, "--local-dir", model_path],
-        log_step=f"download_model_{model_name}"
-    ):
+    try:
+        snapshot_download(repo_id=model_id, local_dir=model_path, max_workers=config.DOWNLOAD_WORKERS)
+    except HfHubHTTPError as e:
+        log_file = os.path.join(config.LOGS_DIR, f"download_model_{model_name}.log")
+        with open(log_file, "w") as f:
+            f.write(f"{e}\n")
+        logger.error(f"Error occurred while downloading model: {e}, check details in {log_file}")
         return False
     
     # Create a placeholder GGUF file for now (in a real implementation, this would convert the model)
@@ -128,11 +119,13 @@ def download_model(model_id, model_dir, quant_type=None):
     registry_path = os.path.join(config.MODELS_DIR, "registry.json")
     
     # Load existing registry or create new one
+    registry = {"models": {}}
     if os.path.exists(registry_path):
-        with open(registry_path, "r") as f:
-            registry = json.load(f)
-    else:
-        registry = {"models": {}}
+        try:
+            with open(registry_path, "r") as f:
+                registry = json.load(f)
+        except ValueError:
+            logger.warning(f"Registry {registry_path} is corrupt, starting a new one")
     
     # Add model to registry
     registry["models"][model_name] = {
@@ -144,9 +137,16 @@ def download_model(model_id, model_dir, quant_type=None):
         "description": config.SUPPORTED_MODELS[model_id]["description"]
     }
     
-    # Save registry
-    with open(registry_path, "w") as f:
-        json.dump(registry, f, indent=2)
+    # Save registry atomically through a file of its own, so a crash mid-write never
+    # truncates it and concurrent writers never share a temporary file
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(registry_path), prefix="registry-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(registry, f, indent=2)
+        os.replace(tmp_path, registry_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
     
     logger.info(f"Model {model_name} downloaded and set up successfully")
     return True
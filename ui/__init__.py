@@ -1,3 +1,47 @@
 """
 UI package for the BitNet.cpp desktop application.
 """
+from PyQt5.QtCore import QSignalBlocker, QTimer
+
+def fill_combo(combo, values):
+    """Replace a combo box's items with values, used as both text and item data.
+    
+    The combo box's signals are blocked while it is refilled, so callers
+    update anything that depends on the selection once afterwards.
+    """
+    values = list(values)
+    with QSignalBlocker(combo):
+        combo.clear()
+        combo.addItems(values)
+        for index, value in enumerate(values):
+            combo.setItemData(index, value)
+
+def set_busy(progress_bar, busy):
+    """Show a progress bar as an indeterminate busy indicator, or hide it.
+    
+    A hidden bar is given a fixed range, so its busy animation stops
+    instead of repainting in the background.
+    """
+    if busy:
+        progress_bar.setRange(0, 0)
+    else:
+        progress_bar.setRange(0, 1)
+        progress_bar.setValue(0)
+    progress_bar.setVisible(busy)
+
+def throttled(parent, slot, interval=16):
+    """Wrap a slot so that calls within interval ms are coalesced into one.
+    
+    The returned function can be connected to a frequently emitted signal;
+    slot then runs at most once per interval, after the first call.
+    """
+    timer = QTimer(parent)
+    timer.setSingleShot(True)
+    timer.setInterval(interval)
+    timer.timeout.connect(slot)
+    
+    def schedule(*args):
+        if not timer.isActive():
+            timer.start()
+    
+    return schedule
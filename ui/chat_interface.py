@@ -6,18 +6,47 @@ import sys
 import platform
 import threading
 import time
+from html import escape
+from functools import lru_cache
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
     QComboBox, QGroupBox, QTextEdit, QTextBrowser, QSlider,
-    QSpinBox, QSplitter, QMessageBox, QProgressBar
+    QSpinBox, QSplitter, QFormLayout, QMessageBox, QProgressBar
 )
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QSize
-from PyQt5.QtGui import QTextCursor, QFont
+from PyQt5.QtCore import Qt, QThread, QTimer, pyqtSignal, QSize
+from PyQt5.QtGui import QTextCursor, QTextBlockFormat, QTextCharFormat, QFont
 import config
+from ui import fill_combo, set_busy, throttled
+
+# Chat history updates are batched into one document edit per interval (ms)
+CHAT_FLUSH_INTERVAL = 16
+
+# Messages kept in the chat history, so layout cost stays bounded in long chats
+CHAT_MAX_BLOCKS = 1000
+
+# Alignment and HTML template of each role's messages in the chat history
+MESSAGE_TEMPLATES = {
+    "user": (Qt.AlignRight, "<b>You:</b> {content}"),
+    "assistant": (Qt.AlignLeft, "<b>Assistant:</b> {content}"),
+    "system": (Qt.AlignCenter, "<i style='color: gray;'>System: {content}</i>"),
+}
+DEFAULT_MESSAGE_TEMPLATE = (Qt.AlignLeft, "<b>{role}:</b> {content}")
+
+@lru_cache(maxsize=None)
+def message_block_format(alignment):
+    """Create the paragraph format of a chat message."""
+    block_format = QTextBlockFormat()
+    block_format.setAlignment(alignment)
+    block_format.setTopMargin(10)
+    block_format.setBottomMargin(10)
+    block_format.setLeftMargin(10)
+    block_format.setRightMargin(10)
+    return block_format
 
 class ChatCompletionThread(QThread):
     """Thread for chat completion."""
     progress = pyqtSignal(str)
+    token = pyqtSignal(str)
     response_received = pyqtSignal(str)
     finished = pyqtSignal(bool, str)
     
@@ -36,18 +65,19 @@ class ChatCompletionThread(QThread):
         try:
             self.progress.emit(f"Generating response with model {self.model_name}...")
             
-            # Convert messages to format expected by inference engine
-            formatted_messages = []
-            for msg in self.messages:
-                formatted_messages.append({
-                    "role": msg["role"],
-                    "content": msg["content"]
-                })
+            # Stream the completion, emitting each piece of text as it is generated
+            parts = []
+            
+            def callback(response):
+                content = response["choices"][0]["delta"].get("content")
+                if content:
+                    parts.append(content)
+                    self.token.emit(content)
             
-            # Run chat completion
-            response = self.inference_engine.chat_completion(
+            self.inference_engine.stream_chat_completion(
                 model_name=self.model_name,
-                messages=formatted_messages,
+                messages=self.messages,
+                callback=callback,
                 n_predict=self.n_predict,
                 threads=self.threads,
                 ctx_size=2048,
@@ -55,7 +85,7 @@ class ChatCompletionThread(QThread):
             )
             
             # Extract assistant response
-            assistant_response = response["choices"][0]["message"]["content"]
+            assistant_response = "".join(parts).strip()
             
             # Emit response
             self.response_received.emit(assistant_response)
@@ -76,6 +106,19 @@ class ChatInterfaceWidget(QWidget):
         # Initialize chat messages
         self.messages = []
         
+        # Thread generating the current response, if any
+        self.chat_thread = None
+        
+        # Chat history updates waiting for the next flush, and whether the
+        # assistant message being generated has been started in the history
+        self._pending_chat = []
+        self._streaming_reply = False
+        self._reply_whitespace = ""
+        self._chat_flush_timer = QTimer(self)
+        self._chat_flush_timer.setSingleShot(True)
+        self._chat_flush_timer.setInterval(CHAT_FLUSH_INTERVAL)
+        self._chat_flush_timer.timeout.connect(self.flush_chat)
+        
         # Create layout
         self.layout = QVBoxLayout(self)
         
@@ -119,44 +162,33 @@ class ChatInterfaceWidget(QWidget):
         
         # Generation parameters
         params_group = QGroupBox("Generation Parameters")
-        params_layout = QVBoxLayout()
+        params_layout = QFormLayout()
         
         # Temperature
         temp_layout = QHBoxLayout()
-        temp_layout.addWidget(QLabel("Temperature:"))
         
         self.temperature_slider = QSlider(Qt.Horizontal)
         self.temperature_slider.setRange(0, 100)
         self.temperature_slider.setValue(70)  # Default 0.7
-        self.temperature_slider.valueChanged.connect(self.update_temperature_label)
+        self.temperature_slider.valueChanged.connect(throttled(self, self.update_temperature_label))
         temp_layout.addWidget(self.temperature_slider)
         
         self.temperature_label = QLabel("0.7")
         temp_layout.addWidget(self.temperature_label)
         
-        params_layout.addLayout(temp_layout)
+        params_layout.addRow("Temperature:", temp_layout)
         
         # Max tokens
-        tokens_layout = QHBoxLayout()
-        tokens_layout.addWidget(QLabel("Max Tokens:"))
-        
         self.max_tokens_spin = QSpinBox()
         self.max_tokens_spin.setRange(1, 2048)
         self.max_tokens_spin.setValue(128)
-        tokens_layout.addWidget(self.max_tokens_spin)
-        
-        params_layout.addLayout(tokens_layout)
+        params_layout.addRow("Max Tokens:", self.max_tokens_spin)
         
         # Threads
-        threads_layout = QHBoxLayout()
-        threads_layout.addWidget(QLabel("Threads:"))
-        
         self.threads_spin = QSpinBox()
         self.threads_spin.setRange(1, 32)
         self.threads_spin.setValue(4)
-        threads_layout.addWidget(self.threads_spin)
-        
-        params_layout.addLayout(threads_layout)
+        params_layout.addRow("Threads:", self.threads_spin)
         
         params_group.setLayout(params_layout)
         left_layout.addWidget(params_group)
@@ -175,6 +207,7 @@ class ChatInterfaceWidget(QWidget):
         # Chat history browser
         self.chat_browser = QTextBrowser()
         self.chat_browser.setMinimumHeight(300)
+        self.chat_browser.document().setMaximumBlockCount(CHAT_MAX_BLOCKS)
         chat_layout.addWidget(self.chat_browser)
         
         # User input
@@ -190,8 +223,7 @@ class ChatInterfaceWidget(QWidget):
         
         # Progress bar
         self.progress_bar = QProgressBar()
-        self.progress_bar.setRange(0, 0)  # Indeterminate progress
-        self.progress_bar.setVisible(False)
+        set_busy(self.progress_bar, False)
         chat_layout.addWidget(self.progress_bar)
         
         # Progress label
@@ -210,15 +242,13 @@ class ChatInterfaceWidget(QWidget):
         main_layout.addWidget(splitter)
         self.layout.addLayout(main_layout)
     
-    def refresh_models(self):
-        """Refresh model list."""
-        # Clear combo box
-        self.model_combo.clear()
+    def refresh_models(self, installed_models=None):
+        """Refresh model list, using installed_models if the caller already listed them."""
+        if installed_models is None:
+            installed_models = self.model_manager.list_installed_models()
         
         # Add installed models
-        installed_models = self.model_manager.list_installed_models()
-        for model_name, info in installed_models.items():
-            self.model_combo.addItem(model_name, model_name)
+        fill_combo(self.model_combo, installed_models)
     
     def update_temperature_label(self):
         """Update temperature label based on slider value."""
@@ -227,6 +257,10 @@ class ChatInterfaceWidget(QWidget):
     
     def send_message(self):
         """Send user message and get response."""
+        # Only one response is generated at a time
+        if self.chat_thread is not None:
+            return
+        
         # Get selected model
         model_name = self.model_combo.currentData()
         
@@ -271,7 +305,7 @@ class ChatInterfaceWidget(QWidget):
         threads = self.threads_spin.value()
         
         # Show progress
-        self.progress_bar.setVisible(True)
+        set_busy(self.progress_bar, True)
         self.progress_label.setText(f"Generating response with model {model_name}...")
         
         # Disable send button
@@ -287,27 +321,47 @@ class ChatInterfaceWidget(QWidget):
             temperature
         )
         self.chat_thread.progress.connect(self.update_progress)
+        self.chat_thread.token.connect(self.on_token_received)
         self.chat_thread.response_received.connect(self.on_response_received)
         self.chat_thread.finished.connect(self.on_chat_finished)
         self.chat_thread.start()
     
     def add_message_to_chat(self, role, content):
         """Add a message to the chat history."""
-        # Create formatted message
-        if role == "user":
-            formatted_message = f"<div style='text-align: right; margin: 10px;'><b>You:</b> {content}</div>"
-        elif role == "assistant":
-            formatted_message = f"<div style='text-align: left; margin: 10px;'><b>Assistant:</b> {content}</div>"
-        elif role == "system":
-            formatted_message = f"<div style='text-align: center; margin: 10px; color: gray;'><i>System: {content}</i></div>"
-        else:
-            formatted_message = f"<div style='margin: 10px;'><b>{role}:</b> {content}</div>"
-        
-        # Add to chat browser
-        self.chat_browser.append(formatted_message)
+        # Create formatted message, escaping the text so it is shown as typed
+        alignment, template = MESSAGE_TEMPLATES.get(role, DEFAULT_MESSAGE_TEMPLATE)
+        formatted_message = template.format(role=escape(role), content=escape(content))
+        
+        # Add to chat browser as a new paragraph on the next flush
+        self._pending_chat.append((message_block_format(alignment), formatted_message))
+        if not self._chat_flush_timer.isActive():
+            self._chat_flush_timer.start()
+    
+    def flush_chat(self):
+        """Insert pending messages and streamed text at the end of the chat history in one edit."""
+        if not self._pending_chat:
+            return
+        
+        cursor = self.chat_browser.textCursor()
+        cursor.movePosition(QTextCursor.End)
+        cursor.beginEditBlock()
+        for block_format, html in self._pending_chat:
+            # Streamed text extends the last message as plain text
+            if block_format is None:
+                cursor.insertText(html, QTextCharFormat())
+                continue
+            
+            if not self.chat_browser.document().isEmpty():
+                cursor.insertBlock(block_format, QTextCharFormat())
+            cursor.insertHtml(html)
+            # Inserted HTML brings its own paragraph format; restore the message's
+            cursor.setBlockFormat(block_format)
+        cursor.endEditBlock()
+        self._pending_chat.clear()
         
         # Scroll to bottom
-        self.chat_browser.verticalScrollBar().setValue(self.chat_browser.verticalScrollBar().maximum())
+        self.chat_browser.setTextCursor(cursor)
+        self.chat_browser.ensureCursorVisible()
     
     def update_progress(self, message):
         """Update progress message."""
@@ -315,19 +369,48 @@ class ChatInterfaceWidget(QWidget):
     
     def on_response_received(self, response):
         """Handle response received event."""
-        # Add assistant message
+        # Add assistant message; its text is already in the chat from streaming
         self.messages.append({
             "role": "assistant",
             "content": response
         })
         
-        # Add assistant message to chat
-        self.add_message_to_chat("assistant", response)
+        if not self._streaming_reply:
+            self.add_message_to_chat("assistant", response)
+    
+    def on_token_received(self, token):
+        """Handle a piece of the assistant response as it is generated."""
+        # Start the assistant message with the first piece, then extend it
+        if not self._streaming_reply:
+            self._streaming_reply = True
+            self._reply_whitespace = ""
+            token = token.lstrip()
+            self.add_message_to_chat("assistant", "")
+        
+        # Hold back trailing whitespace until more text follows, so the
+        # message does not end in an empty paragraph
+        text = self._reply_whitespace + token
+        stripped = text.rstrip()
+        self._reply_whitespace = text[len(stripped):]
+        if not stripped:
+            return
+        
+        self._pending_chat.append((None, stripped))
+        if not self._chat_flush_timer.isActive():
+            self._chat_flush_timer.start()
     
     def on_chat_finished(self, success, message):
         """Handle chat finished event."""
+        # The signal is sent just before run returns; let the thread end, then free it
+        self.chat_thread.wait()
+        self.chat_thread.deleteLater()
+        self.chat_thread = None
+        
+        # The next response starts a new assistant message
+        self._streaming_reply = False
+        
         # Hide progress
-        self.progress_bar.setVisible(False)
+        set_busy(self.progress_bar, False)
         self.progress_label.setText(message)
         
         # Enable send button
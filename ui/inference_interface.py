@@ -7,21 +7,27 @@ import platform
 import threading
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
-    QComboBox, QGroupBox, QTextEdit, QTextBrowser, QSlider,
-    QSpinBox, QSplitter, QMessageBox, QProgressBar, QCheckBox
+    QComboBox, QGroupBox, QTextEdit, QPlainTextEdit, QSlider,
+    QSpinBox, QSplitter, QFormLayout, QMessageBox, QProgressBar, QCheckBox
 )
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtCore import Qt, QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt5.QtGui import QTextCursor
 import config
+from ui import fill_combo, set_busy, throttled
 
-class InferenceThread(QThread):
-    """Thread for running inference."""
+class InferenceSignals(QObject):
+    """Signals emitted by an inference task."""
     progress = pyqtSignal(str)
-    response_received = pyqtSignal(str)
+    token = pyqtSignal(str)
     finished = pyqtSignal(bool, str)
+
+class InferenceTask(QRunnable):
+    """Task for running inference on a thread pool."""
     
     def __init__(self, inference_engine, model_name, prompt, n_predict, threads, ctx_size, temperature, conversation):
-        """Initialize the thread."""
+        """Initialize the task."""
         super().__init__()
+        self.signals = InferenceSignals()
         self.inference_engine = inference_engine
         self.model_name = model_name
         self.prompt = prompt
@@ -32,14 +38,15 @@ class InferenceThread(QThread):
         self.conversation = conversation
     
     def run(self):
-        """Run the thread."""
+        """Run the task."""
         try:
-            self.progress.emit(f"Running inference with model {self.model_name}...")
+            self.signals.progress.emit(f"Running inference with model {self.model_name}...")
             
-            # Run inference
-            response = self.inference_engine.run_inference(
+            # Run inference, emitting the output as it is generated
+            self.inference_engine.stream_inference(
                 model_name=self.model_name,
                 prompt=self.prompt,
+                callback=self.signals.token.emit,
                 n_predict=self.n_predict,
                 threads=self.threads,
                 ctx_size=self.ctx_size,
@@ -47,11 +54,9 @@ class InferenceThread(QThread):
                 conversation=self.conversation
             )
             
-            # Emit response
-            self.response_received.emit(response)
-            self.finished.emit(True, "Inference completed successfully")
+            self.signals.finished.emit(True, "Inference completed successfully")
         except Exception as e:
-            self.finished.emit(False, f"Error running inference: {str(e)}")
+            self.signals.finished.emit(False, f"Error running inference: {str(e)}")
 
 class InferenceInterfaceWidget(QWidget):
     """Widget for inference interface."""
@@ -63,6 +68,10 @@ class InferenceInterfaceWidget(QWidget):
         self.model_manager = model_manager
         self.inference_engine = inference_engine
         
+        # Inference runs on a single reused thread, one request at a time
+        self.inference_pool = QThreadPool(self)
+        self.inference_pool.setMaxThreadCount(1)
+        
         # Create layout
         self.layout = QVBoxLayout(self)
         
@@ -94,60 +103,44 @@ class InferenceInterfaceWidget(QWidget):
         
         # Generation parameters
         params_group = QGroupBox("Generation Parameters")
-        params_layout = QVBoxLayout()
+        params_layout = QFormLayout()
         
         # Temperature
         temp_layout = QHBoxLayout()
-        temp_layout.addWidget(QLabel("Temperature:"))
         
         self.temperature_slider = QSlider(Qt.Horizontal)
         self.temperature_slider.setRange(0, 100)
         self.temperature_slider.setValue(70)  # Default 0.7
-        self.temperature_slider.valueChanged.connect(self.update_temperature_label)
+        self.temperature_slider.valueChanged.connect(throttled(self, self.update_temperature_label))
         temp_layout.addWidget(self.temperature_slider)
         
         self.temperature_label = QLabel("0.7")
         temp_layout.addWidget(self.temperature_label)
         
-        params_layout.addLayout(temp_layout)
+        params_layout.addRow("Temperature:", temp_layout)
         
         # Max tokens
-        tokens_layout = QHBoxLayout()
-        tokens_layout.addWidget(QLabel("Max Tokens:"))
-        
         self.max_tokens_spin = QSpinBox()
         self.max_tokens_spin.setRange(1, 2048)
         self.max_tokens_spin.setValue(128)
-        tokens_layout.addWidget(self.max_tokens_spin)
-        
-        params_layout.addLayout(tokens_layout)
+        params_layout.addRow("Max Tokens:", self.max_tokens_spin)
         
         # Context size
-        ctx_layout = QHBoxLayout()
-        ctx_layout.addWidget(QLabel("Context Size:"))
-        
         self.ctx_size_spin = QSpinBox()
         self.ctx_size_spin.setRange(512, 4096)
         self.ctx_size_spin.setValue(2048)
         self.ctx_size_spin.setSingleStep(512)
-        ctx_layout.addWidget(self.ctx_size_spin)
-        
-        params_layout.addLayout(ctx_layout)
+        params_layout.addRow("Context Size:", self.ctx_size_spin)
         
         # Threads
-        threads_layout = QHBoxLayout()
-        threads_layout.addWidget(QLabel("Threads:"))
-        
         self.threads_spin = QSpinBox()
         self.threads_spin.setRange(1, 32)
         self.threads_spin.setValue(4)
-        threads_layout.addWidget(self.threads_spin)
-        
-        params_layout.addLayout(threads_layout)
+        params_layout.addRow("Threads:", self.threads_spin)
         
         # Conversation mode
         self.conversation_check = QCheckBox("Conversation Mode")
-        params_layout.addWidget(self.conversation_check)
+        params_layout.addRow(self.conversation_check)
         
         params_group.setLayout(params_layout)
         left_layout.addWidget(params_group)
@@ -181,13 +174,13 @@ class InferenceInterfaceWidget(QWidget):
         response_layout = QVBoxLayout()
         
         # Response browser
-        self.response_browser = QTextBrowser()
+        self.response_browser = QPlainTextEdit()
+        self.response_browser.setReadOnly(True)
         response_layout.addWidget(self.response_browser)
         
         # Progress bar
         self.progress_bar = QProgressBar()
-        self.progress_bar.setRange(0, 0)  # Indeterminate progress
-        self.progress_bar.setVisible(False)
+        set_busy(self.progress_bar, False)
         response_layout.addWidget(self.progress_bar)
         
         # Progress label
@@ -206,15 +199,13 @@ class InferenceInterfaceWidget(QWidget):
         main_layout.addWidget(splitter)
         self.layout.addLayout(main_layout)
     
-    def refresh_models(self):
-        """Refresh model list."""
-        # Clear combo box
-        self.model_combo.clear()
+    def refresh_models(self, installed_models=None):
+        """Refresh model list, using installed_models if the caller already listed them."""
+        if installed_models is None:
+            installed_models = self.model_manager.list_installed_models()
         
         # Add installed models
-        installed_models = self.model_manager.list_installed_models()
-        for model_name, info in installed_models.items():
-            self.model_combo.addItem(model_name, model_name)
+        fill_combo(self.model_combo, installed_models)
     
     def update_temperature_label(self):
         """Update temperature label based on slider value."""
@@ -245,7 +236,7 @@ class InferenceInterfaceWidget(QWidget):
         conversation = self.conversation_check.isChecked()
         
         # Show progress
-        self.progress_bar.setVisible(True)
+        set_busy(self.progress_bar, True)
         self.progress_label.setText(f"Running inference with model {model_name}...")
         
         # Clear response
@@ -254,8 +245,8 @@ class InferenceInterfaceWidget(QWidget):
         # Disable run button
         self.run_button.setEnabled(False)
         
-        # Create and start inference thread
-        self.inference_thread = InferenceThread(
+        # Create and start inference task
+        task = InferenceTask(
             self.inference_engine,
             model_name,
             prompt,
@@ -265,24 +256,25 @@ class InferenceInterfaceWidget(QWidget):
             temperature,
             conversation
         )
-        self.inference_thread.progress.connect(self.update_progress)
-        self.inference_thread.response_received.connect(self.on_response_received)
-        self.inference_thread.finished.connect(self.on_inference_finished)
-        self.inference_thread.start()
+        task.signals.progress.connect(self.update_progress)
+        task.signals.token.connect(self.on_token_received)
+        task.signals.finished.connect(self.on_inference_finished)
+        self.inference_pool.start(task)
     
     def update_progress(self, message):
         """Update progress message."""
         self.progress_label.setText(message)
     
-    def on_response_received(self, response):
-        """Handle response received event."""
-        # Set response
-        self.response_browser.setPlainText(response)
+    def on_token_received(self, token):
+        """Handle a piece of the response as it is generated."""
+        # Append to the end of the response
+        self.response_browser.moveCursor(QTextCursor.End)
+        self.response_browser.insertPlainText(token)
     
     def on_inference_finished(self, success, message):
         """Handle inference finished event."""
         # Hide progress
-        self.progress_bar.setVisible(False)
+        set_busy(self.progress_bar, False)
         self.progress_label.setText(message)
         
         # Enable run button
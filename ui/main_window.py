@@ -10,15 +10,19 @@ from PyQt5.QtWidgets import (
     QPushButton, QLabel, QStatusBar, QAction, QMenu, QToolBar,
     QMessageBox
 )
-from PyQt5.QtCore import Qt, QSize
+from PyQt5.QtCore import Qt, QSize, QSignalBlocker
 from PyQt5.QtGui import QIcon
 
 from ui.model_management import ModelManagementWidget
 from ui.chat_interface import ChatInterfaceWidget
 from ui.inference_interface import InferenceInterfaceWidget
-from ui.settings_dialog import SettingsDialog
 import config
 
+# Style sheets of the header labels
+TITLE_STYLE = "font-size: 24px; font-weight: bold;"
+DESCRIPTION_STYLE = "font-size: 14px;"
+NOTE_STYLE = "font-size: 12px; color: gray;"
+
 class MainWindow(QMainWindow):
     """Main window for the BitNet.cpp desktop application."""
     def __init__(self, model_manager, inference_engine):
@@ -54,6 +58,10 @@ class MainWindow(QMainWindow):
         
         # Create toolbar
         self.create_toolbar()
+        
+        # Settings and exit confirmation dialogs, built when first needed
+        self.settings_dialog = None
+        self.exit_dialog = None
     
     def create_header(self):
         """Create header with title and description."""
@@ -61,19 +69,19 @@ class MainWindow(QMainWindow):
         
         # Title
         title_label = QLabel("BitNet.cpp Desktop")
-        title_label.setStyleSheet("font-size: 24px; font-weight: bold;")
+        title_label.setStyleSheet(TITLE_STYLE)
         title_label.setAlignment(Qt.AlignCenter)
         header_layout.addWidget(title_label)
         
         # Description
         description_label = QLabel("Run BitNet models locally on your CPU")
-        description_label.setStyleSheet("font-size: 14px;")
+        description_label.setStyleSheet(DESCRIPTION_STYLE)
         description_label.setAlignment(Qt.AlignCenter)
         header_layout.addWidget(description_label)
         
         # Note
         note_label = QLabel("All processing is done locally - no cloud services or GPU required")
-        note_label.setStyleSheet("font-size: 12px; color: gray;")
+        note_label.setStyleSheet(NOTE_STYLE)
         note_label.setAlignment(Qt.AlignCenter)
         header_layout.addWidget(note_label)
         
@@ -87,16 +95,35 @@ class MainWindow(QMainWindow):
         self.model_management_widget = ModelManagementWidget(self.model_manager)
         self.tabs.addTab(self.model_management_widget, "Model Management")
         
-        # Chat interface tab
-        self.chat_interface_widget = ChatInterfaceWidget(self.model_manager, self.inference_engine)
-        self.tabs.addTab(self.chat_interface_widget, "Chat")
+        # Chat and inference tabs start as placeholders and are built when first opened
+        self.chat_interface_widget = None
+        self.tabs.addTab(QWidget(), "Chat")
+        
+        self.inference_interface_widget = None
+        self.tabs.addTab(QWidget(), "Inference")
         
-        # Inference interface tab
-        self.inference_interface_widget = InferenceInterfaceWidget(self.model_manager, self.inference_engine)
-        self.tabs.addTab(self.inference_interface_widget, "Inference")
+        self.tabs.currentChanged.connect(self.create_tab)
         
         self.layout.addWidget(self.tabs)
     
+    def create_tab(self, index):
+        """Replace a placeholder tab with its widget the first time it is opened."""
+        label = self.tabs.tabText(index)
+        if label == "Chat" and self.chat_interface_widget is None:
+            widget = self.chat_interface_widget = ChatInterfaceWidget(self.model_manager, self.inference_engine)
+        elif label == "Inference" and self.inference_interface_widget is None:
+            widget = self.inference_interface_widget = InferenceInterfaceWidget(self.model_manager, self.inference_engine)
+        else:
+            return
+        
+        # Swapping the tab moves the current index; keep that from re-entering here
+        placeholder = self.tabs.widget(index)
+        with QSignalBlocker(self.tabs):
+            self.tabs.removeTab(index)
+            self.tabs.insertTab(index, widget, label)
+            self.tabs.setCurrentIndex(index)
+        placeholder.deleteLater()
+    
     def create_menu_bar(self):
         """Create menu bar with menus and actions."""
         # File menu
@@ -149,8 +176,16 @@ class MainWindow(QMainWindow):
     
     def show_settings(self):
         """Show settings dialog."""
-        dialog = SettingsDialog(self)
-        dialog.exec_()
+        if self.settings_dialog is None:
+            # Import the dialog only once it is first needed, keeping it off the startup path
+            from ui.settings_dialog import SettingsDialog
+            
+            self.settings_dialog = SettingsDialog(self)
+        else:
+            # Discard edits left from a previous, cancelled opening
+            self.settings_dialog.load_settings()
+        
+        self.settings_dialog.exec_()
     
     def show_about(self):
         """Show about dialog."""
@@ -164,22 +199,35 @@ class MainWindow(QMainWindow):
     
     def refresh_models(self):
         """Refresh model lists."""
-        self.model_management_widget.refresh_models()
-        self.chat_interface_widget.refresh_models()
-        self.inference_interface_widget.refresh_models()
+        # List the models once and share the result with every tab
+        installed_models = self.model_manager.list_installed_models()
+        available_models = self.model_manager.list_available_models()
+        
+        self.model_management_widget.refresh_models(installed_models, available_models)
+        if self.chat_interface_widget is not None:
+            self.chat_interface_widget.refresh_models(installed_models)
+        if self.inference_interface_widget is not None:
+            self.inference_interface_widget.refresh_models(installed_models)
         self.status_bar.showMessage("Models refreshed", 3000)
     
     def closeEvent(self, event):
         """Handle window close event."""
-        reply = QMessageBox.question(
-            self,
-            "Exit",
-            "Are you sure you want to exit?",
-            QMessageBox.Yes | QMessageBox.No,
-            QMessageBox.No
-        )
-        
-        if reply == QMessageBox.Yes:
+        if not config.ASK_ON_EXIT:
+            event.accept()
+            return
+        
+        # Build the confirmation once and reuse it on later close attempts
+        if self.exit_dialog is None:
+            self.exit_dialog = QMessageBox(
+                QMessageBox.Question,
+                "Exit",
+                "Are you sure you want to exit?",
+                QMessageBox.Yes | QMessageBox.No,
+                self
+            )
+            self.exit_dialog.setDefaultButton(QMessageBox.No)
+        
+        if self.exit_dialog.exec_() == QMessageBox.Yes:
             event.accept()
         else:
             event.ignore()
@@ -3,62 +3,75 @@ Model management widget for the BitNet.cpp desktop application.
 """
 import os
 import sys
-import platform
 import threading
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
     QComboBox, QGroupBox, QTextBrowser, QProgressBar,
     QMessageBox, QSplitter
 )
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtCore import Qt, QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+from PyQt5.QtGui import QTextDocument
 import config
+from ui import fill_combo, set_busy
 
-class ModelDownloadThread(QThread):
-    """Thread for downloading models."""
+# Quantization types supported on this machine's architecture
+QUANT_TYPES = sorted(config.SUPPORTED_QUANT_TYPES.get(config.ARCH, ()))
+
+# Number of models downloaded at the same time; further downloads wait their turn
+MAX_CONCURRENT_DOWNLOADS = 2
+
+# Tasks finishing within this many ms of each other share one model list refresh
+REFRESH_DELAY = 50
+
+class ModelTaskSignals(QObject):
+    """Signals emitted by a model download or removal task."""
     progress = pyqtSignal(str)
     finished = pyqtSignal(bool, str)
+
+class ModelDownloadTask(QRunnable):
+    """Task for downloading models on the shared thread pool."""
     
     def __init__(self, model_manager, model_id, quant_type=None):
-        """Initialize the thread."""
+        """Initialize the task."""
         super().__init__()
+        self.signals = ModelTaskSignals()
         self.model_manager = model_manager
         self.model_id = model_id
         self.quant_type = quant_type
     
     def run(self):
-        """Run the thread."""
+        """Run the task."""
         try:
-            self.progress.emit(f"Downloading model {self.model_id}...")
+            self.signals.progress.emit(f"Downloading model {self.model_id}...")
             success = self.model_manager.download_model(self.model_id, self.quant_type)
             if success:
-                self.finished.emit(True, f"Model {self.model_id} downloaded successfully")
+                self.signals.finished.emit(True, f"Model {self.model_id} downloaded successfully")
             else:
-                self.finished.emit(False, f"Failed to download model {self.model_id}")
+                self.signals.finished.emit(False, f"Failed to download model {self.model_id}")
         except Exception as e:
-            self.finished.emit(False, f"Error downloading model: {str(e)}")
+            self.signals.finished.emit(False, f"Error downloading model: {str(e)}")
 
-class ModelRemoveThread(QThread):
-    """Thread for removing models."""
-    progress = pyqtSignal(str)
-    finished = pyqtSignal(bool, str)
+class ModelRemoveTask(QRunnable):
+    """Task for removing models on the shared thread pool."""
     
     def __init__(self, model_manager, model_name):
-        """Initialize the thread."""
+        """Initialize the task."""
         super().__init__()
+        self.signals = ModelTaskSignals()
         self.model_manager = model_manager
         self.model_name = model_name
     
     def run(self):
-        """Run the thread."""
+        """Run the task."""
         try:
-            self.progress.emit(f"Removing model {self.model_name}...")
+            self.signals.progress.emit(f"Removing model {self.model_name}...")
             success = self.model_manager.remove_model(self.model_name)
             if success:
-                self.finished.emit(True, f"Model {self.model_name} removed successfully")
+                self.signals.finished.emit(True, f"Model {self.model_name} removed successfully")
             else:
-                self.finished.emit(False, f"Failed to remove model {self.model_name}")
+                self.signals.finished.emit(False, f"Failed to remove model {self.model_name}")
         except Exception as e:
-            self.finished.emit(False, f"Error removing model: {str(e)}")
+            self.signals.finished.emit(False, f"Error removing model: {str(e)}")
 
 class ModelManagementWidget(QWidget):
     """Widget for managing models."""
@@ -69,6 +82,22 @@ class ModelManagementWidget(QWidget):
         # Store reference to model manager
         self.model_manager = model_manager
         
+        # Downloads run on their own pool; model IDs being downloaded or waiting, in order
+        self.download_pool = QThreadPool(self)
+        self.download_pool.setMaxThreadCount(MAX_CONCURRENT_DOWNLOADS)
+        self.active_downloads = []
+        
+        # Installed models as of the last refresh, shown without asking the manager again,
+        # and their formatted info by model name
+        self.installed_models = {}
+        self.model_info_documents = {}
+        
+        # Refresh scheduled after a task finishes, restarted by each further completion
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.setInterval(REFRESH_DELAY)
+        self.refresh_timer.timeout.connect(self.refresh_models)
+        
         # Create layout
         self.layout = QVBoxLayout(self)
         
@@ -103,13 +132,7 @@ class ModelManagementWidget(QWidget):
         
         # Quantization type combo box
         self.quant_type_combo = QComboBox()
-        self.quant_type_combo.addItem("Default Quantization")
-        
-        # Add supported quantization types based on architecture
-        arch = platform.machine().lower()
-        if arch in config.SUPPORTED_QUANT_TYPES:
-            for quant_type in config.SUPPORTED_QUANT_TYPES[arch]:
-                self.quant_type_combo.addItem(quant_type)
+        self.quant_type_combo.addItems(["Default Quantization", *QUANT_TYPES])
         
         download_layout.addWidget(self.quant_type_combo)
         
@@ -173,8 +196,7 @@ class ModelManagementWidget(QWidget):
         
         # Progress bar
         self.progress_bar = QProgressBar()
-        self.progress_bar.setRange(0, 0)  # Indeterminate progress
-        self.progress_bar.setVisible(False)
+        set_busy(self.progress_bar, False)
         group_layout.addWidget(self.progress_bar)
         
         # Progress label
@@ -187,48 +209,54 @@ class ModelManagementWidget(QWidget):
         # Add group box to main layout
         self.layout.addWidget(group_box)
     
-    def refresh_models(self):
-        """Refresh model lists."""
-        # Clear combo boxes
-        self.available_models_combo.clear()
-        self.installed_models_combo.clear()
+    def refresh_models(self, installed_models=None, available_models=None):
+        """Refresh model lists, using the given lists if the caller already fetched them."""
+        if installed_models is None:
+            installed_models = self.model_manager.list_installed_models()
+        if available_models is None:
+            available_models = self.model_manager.list_available_models()
         
         # Add available models
-        available_models = self.model_manager.list_available_models()
-        for model_id, info in available_models.items():
-            self.available_models_combo.addItem(model_id, model_id)
+        fill_combo(self.available_models_combo, available_models)
         
         # Add installed models
-        installed_models = self.model_manager.list_installed_models()
-        for model_name, info in installed_models.items():
-            self.installed_models_combo.addItem(model_name, model_name)
+        self.installed_models = installed_models
+        fill_combo(self.installed_models_combo, self.installed_models)
         
-        # Update model info
+        # Update model info once for the refilled list, dropping info formatted before
+        stale_documents = self.model_info_documents
+        self.model_info_documents = {}
         self.update_model_info()
+        for document in stale_documents.values():
+            document.deleteLater()
     
     def update_model_info(self):
         """Update model info based on selected model."""
         # Get selected model
         model_name = self.installed_models_combo.currentData()
         
-        # Clear model info
-        self.model_info_browser.clear()
-        
-        if model_name:
+        # Each model's info is laid out once per refresh and then reused
+        document = self.model_info_documents.get(model_name)
+        if document is None:
+            document = QTextDocument(self)
+            document.setDefaultFont(self.model_info_browser.font())
+            
             # Get model info
-            installed_models = self.model_manager.list_installed_models()
-            if model_name in installed_models:
-                info = installed_models[model_name]
-                
+            info = self.installed_models.get(model_name) if model_name else None
+            if info is not None:
                 # Format model info
-                html = f"<h3>{model_name}</h3>"
-                html += f"<p><b>Model ID:</b> {info.get('model_id', 'Unknown')}</p>"
-                html += f"<p><b>Description:</b> {info.get('description', 'No description available')}</p>"
-                html += f"<p><b>Quantization Type:</b> {info.get('quant_type', 'Unknown')}</p>"
-                html += f"<p><b>Path:</b> {info.get('path', 'Unknown')}</p>"
-                
-                # Set model info
-                self.model_info_browser.setHtml(html)
+                document.setHtml("".join([
+                    f"<h3>{model_name}</h3>",
+                    f"<p><b>Model ID:</b> {info.get('model_id', 'Unknown')}</p>",
+                    f"<p><b>Description:</b> {info.get('description', 'No description available')}</p>",
+                    f"<p><b>Quantization Type:</b> {info.get('quant_type', 'Unknown')}</p>",
+                    f"<p><b>Path:</b> {info.get('path', 'Unknown')}</p>",
+                ]))
+            
+            self.model_info_documents[model_name] = document
+        
+        # Set model info
+        self.model_info_browser.setDocument(document)
     
     def download_model(self):
         """Download selected model."""
@@ -244,19 +272,24 @@ class ModelManagementWidget(QWidget):
         if self.quant_type_combo.currentIndex() > 0:
             quant_type = self.quant_type_combo.currentText()
         
+        if model_id in self.active_downloads:
+            QMessageBox.warning(self, "Warning", f"Model {model_id} is already being downloaded")
+            return
+        
         # Show progress
-        self.progress_bar.setVisible(True)
-        self.progress_label.setText(f"Downloading model {model_id}...")
+        self.active_downloads.append(model_id)
+        set_busy(self.progress_bar, True)
+        self.progress_label.setText(f"Downloading {', '.join(self.active_downloads)}...")
         
-        # Disable buttons
-        self.download_button.setEnabled(False)
+        # Further downloads can be queued, but nothing is removed meanwhile
         self.remove_button.setEnabled(False)
         
-        # Create and start download thread
-        self.download_thread = ModelDownloadThread(self.model_manager, model_id, quant_type)
-        self.download_thread.progress.connect(self.update_progress)
-        self.download_thread.finished.connect(self.on_download_finished)
-        self.download_thread.start()
+        # Create and queue download task
+        task = ModelDownloadTask(self.model_manager, model_id, quant_type)
+        task.signals.finished.connect(
+            lambda success, message: self.on_download_finished(model_id, success, message)
+        )
+        self.download_pool.start(task)
     
     def remove_model(self):
         """Remove selected model."""
@@ -280,54 +313,56 @@ class ModelManagementWidget(QWidget):
             return
         
         # Show progress
-        self.progress_bar.setVisible(True)
+        set_busy(self.progress_bar, True)
         self.progress_label.setText(f"Removing model {model_name}...")
         
         # Disable buttons
         self.download_button.setEnabled(False)
         self.remove_button.setEnabled(False)
         
-        # Create and start remove thread
-        self.remove_thread = ModelRemoveThread(self.model_manager, model_name)
-        self.remove_thread.progress.connect(self.update_progress)
-        self.remove_thread.finished.connect(self.on_remove_finished)
-        self.remove_thread.start()
+        # Create and start remove task
+        task = ModelRemoveTask(self.model_manager, model_name)
+        task.signals.progress.connect(self.update_progress)
+        task.signals.finished.connect(self.on_remove_finished)
+        QThreadPool.globalInstance().start(task)
     
     def update_progress(self, message):
         """Update progress message."""
         self.progress_label.setText(message)
     
-    def on_download_finished(self, success, message):
+    def on_download_finished(self, model_id, success, message):
         """Handle download finished event."""
-        # Hide progress
-        self.progress_bar.setVisible(False)
-        self.progress_label.setText(message)
-        
-        # Enable buttons
-        self.download_button.setEnabled(True)
-        self.remove_button.setEnabled(True)
-        
-        # Refresh models
-        self.refresh_models()
+        self.active_downloads.remove(model_id)
         
-        # Show message
-        if success:
-            QMessageBox.information(self, "Success", message)
+        if self.active_downloads:
+            # Keep showing the downloads still in progress
+            self.progress_label.setText(f"Downloading {', '.join(self.active_downloads)}...")
         else:
-            QMessageBox.critical(self, "Error", message)
+            # Hide progress
+            set_busy(self.progress_bar, False)
+            self.progress_label.setText(message)
+            
+            # Enable buttons
+            self.remove_button.setEnabled(True)
+        
+        self.on_task_finished(success, message)
     
     def on_remove_finished(self, success, message):
         """Handle remove finished event."""
         # Hide progress
-        self.progress_bar.setVisible(False)
+        set_busy(self.progress_bar, False)
         self.progress_label.setText(message)
         
         # Enable buttons
         self.download_button.setEnabled(True)
         self.remove_button.setEnabled(True)
         
+        self.on_task_finished(success, message)
+    
+    def on_task_finished(self, success, message):
+        """Schedule a model list refresh and report a finished download or removal."""
         # Refresh models
-        self.refresh_models()
+        self.refresh_timer.start()
         
         # Show message
         if success:
@@ -2,13 +2,13 @@
 Resources package for the BitNet.cpp desktop application.
 """
 import base64
-import os
+from functools import lru_cache
 from PyQt5.QtGui import QIcon, QPixmap
-from io import BytesIO
 from .icon import ICON_DATA
 
+@lru_cache(maxsize=1)
 def get_icon():
-    """Get the application icon."""
+    """Get the application icon, decoding it only on the first call."""
     icon_data = base64.b64decode(ICON_DATA)
     pixmap = QPixmap()
     pixmap.loadFromData(icon_data)
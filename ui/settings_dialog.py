@@ -1,17 +1,47 @@
 """
 Settings dialog for the BitNet.cpp desktop application.
 """
-import os
-import sys
-import platform
+import re
 from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
-    QLineEdit, QSpinBox, QTabWidget, QWidget, QGroupBox,
-    QFormLayout, QCheckBox, QMessageBox
+    QLineEdit, QTabWidget, QWidget, QFrame,
+    QFormLayout, QCheckBox, QMessageBox, QDialogButtonBox
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QIntValidator
 import config
 
+# Host names and IPv4/IPv6 addresses the API server can bind to
+HOST_PATTERN = re.compile(r"[A-Za-z0-9.:\-]{1,253}")
+
+# Ports the API server can listen on
+PORT_RANGE = (1024, 65535)
+
+# Value each settings field shows when the dialog is opened
+DEFAULT_SETTINGS = {
+    "host": config.API_HOST,
+    "port": config.API_PORT,
+    "auto_start": True,
+    "model_dir": config.MODELS_DIR,
+    "default_model": config.DEFAULT_MODEL,
+    "minimize_to_tray": True,
+    "show_notifications": True,
+}
+
+def create_section(title):
+    """Create a framed group of settings under a bold title, returning it and its form."""
+    section = QFrame()
+    section.setFrameShape(QFrame.StyledPanel)
+    form = QFormLayout(section)
+    form.addRow(QLabel(f"<b>{title}</b>"))
+    return section, form
+
+def set_field_value(widget, value):
+    """Show a value in a settings field."""
+    if isinstance(widget, QLineEdit):
+        widget.setText(str(value))
+    elif isinstance(widget, QCheckBox):
+        widget.setChecked(value)
+
 class SettingsDialog(QDialog):
     """Dialog for configuring application settings."""
     def __init__(self, parent=None):
@@ -25,6 +55,9 @@ class SettingsDialog(QDialog):
         # Create layout
         self.layout = QVBoxLayout(self)
         
+        # Fields of the tabs built so far, by setting name
+        self.fields = {}
+        
         # Create tabs
         self.create_tabs()
         
@@ -35,47 +68,56 @@ class SettingsDialog(QDialog):
         """Create tabs for different settings categories."""
         self.tabs = QTabWidget()
         
-        # Server settings tab
+        # Each tab starts empty and is filled in by its builder when first opened
         self.server_tab = QWidget()
-        self.create_server_tab()
         self.tabs.addTab(self.server_tab, "Server")
         
-        # Model settings tab
         self.model_tab = QWidget()
-        self.create_model_tab()
         self.tabs.addTab(self.model_tab, "Models")
         
-        # UI settings tab
         self.ui_tab = QWidget()
-        self.create_ui_tab()
         self.tabs.addTab(self.ui_tab, "UI")
         
+        self.pending_tabs = {
+            self.server_tab: self.create_server_tab,
+            self.model_tab: self.create_model_tab,
+            self.ui_tab: self.create_ui_tab,
+        }
+        self.tabs.currentChanged.connect(self.build_tab)
+        self.build_tab(self.tabs.currentIndex())
+        
         self.layout.addWidget(self.tabs)
     
+    def build_tab(self, index):
+        """Build a tab's contents the first time it is opened."""
+        tab = self.tabs.widget(index)
+        builder = self.pending_tabs.pop(tab, None)
+        if builder is not None:
+            # The tab may already be on screen; paint it once, after all its rows are in place
+            tab.setUpdatesEnabled(False)
+            builder()
+            tab.setUpdatesEnabled(True)
+    
     def create_server_tab(self):
         """Create server settings tab."""
         layout = QVBoxLayout(self.server_tab)
         
         # API server settings
-        group = QGroupBox("API Server")
-        form = QFormLayout()
+        group, form = create_section("API Server")
         
         # Host
-        self.host_edit = QLineEdit(config.API_HOST)
+        self.host_edit = self.add_field("host", QLineEdit())
         form.addRow("Host:", self.host_edit)
         
         # Port
-        self.port_spin = QSpinBox()
-        self.port_spin.setRange(1024, 65535)
-        self.port_spin.setValue(config.API_PORT)
-        form.addRow("Port:", self.port_spin)
+        self.port_edit = self.add_field("port", QLineEdit())
+        self.port_edit.setValidator(QIntValidator(*PORT_RANGE, self.port_edit))
+        form.addRow("Port:", self.port_edit)
         
         # Auto-start server
-        self.auto_start_check = QCheckBox("Start server automatically")
-        self.auto_start_check.setChecked(True)
+        self.auto_start_check = self.add_field("auto_start", QCheckBox("Start server automatically"))
         form.addRow("", self.auto_start_check)
         
-        group.setLayout(form)
         layout.addWidget(group)
         
         # Add stretch to push everything to the top
@@ -86,29 +128,25 @@ class SettingsDialog(QDialog):
         layout = QVBoxLayout(self.model_tab)
         
         # Model directory
-        group = QGroupBox("Model Directory")
-        form = QFormLayout()
+        group, form = create_section("Model Directory")
         
         # Directory
-        self.model_dir_edit = QLineEdit(config.MODELS_DIR)
+        self.model_dir_edit = self.add_field("model_dir", QLineEdit())
         form.addRow("Directory:", self.model_dir_edit)
         
         # Browse button
         browse_button = QPushButton("Browse...")
         form.addRow("", browse_button)
         
-        group.setLayout(form)
         layout.addWidget(group)
         
         # Default model settings
-        group = QGroupBox("Default Settings")
-        form = QFormLayout()
+        group, form = create_section("Default Settings")
         
         # Default model
-        self.default_model_edit = QLineEdit(config.DEFAULT_MODEL)
+        self.default_model_edit = self.add_field("default_model", QLineEdit())
         form.addRow("Default Model:", self.default_model_edit)
         
-        group.setLayout(form)
         layout.addWidget(group)
         
         # Add stretch to push everything to the top
@@ -119,38 +157,47 @@ class SettingsDialog(QDialog):
         layout = QVBoxLayout(self.ui_tab)
         
         # UI settings
-        group = QGroupBox("UI Settings")
-        form = QFormLayout()
+        group, form = create_section("UI Settings")
         
         # Minimize to tray
-        self.minimize_to_tray_check = QCheckBox("Minimize to system tray")
-        self.minimize_to_tray_check.setChecked(True)
+        self.minimize_to_tray_check = self.add_field("minimize_to_tray", QCheckBox("Minimize to system tray"))
         form.addRow("", self.minimize_to_tray_check)
         
         # Show notifications
-        self.show_notifications_check = QCheckBox("Show notifications")
-        self.show_notifications_check.setChecked(True)
+        self.show_notifications_check = self.add_field("show_notifications", QCheckBox("Show notifications"))
         form.addRow("", self.show_notifications_check)
         
-        group.setLayout(form)
         layout.addWidget(group)
         
         # Add stretch to push everything to the top
         layout.addStretch()
     
+    def add_field(self, name, widget):
+        """Register a settings field and show its default value."""
+        self.fields[name] = widget
+        set_field_value(widget, DEFAULT_SETTINGS[name])
+        return widget
+    
+    def load_settings(self):
+        """Reset the fields of the tabs built so far to the current settings."""
+        for name, widget in self.fields.items():
+            set_field_value(widget, DEFAULT_SETTINGS[name])
+        self.error_label.clear()
+    
     def create_buttons(self):
         """Create dialog buttons."""
         button_layout = QHBoxLayout()
         
-        # Save button
-        save_button = QPushButton("Save")
-        save_button.clicked.connect(self.save_settings)
-        button_layout.addWidget(save_button)
+        # Validation errors are shown next to the buttons
+        self.error_label = QLabel()
+        self.error_label.setStyleSheet("color: red;")
+        button_layout.addWidget(self.error_label, 1)
         
-        # Cancel button
-        cancel_button = QPushButton("Cancel")
-        cancel_button.clicked.connect(self.reject)
-        button_layout.addWidget(cancel_button)
+        # Save and cancel buttons
+        button_box = QDialogButtonBox(QDialogButtonBox.Save | QDialogButtonBox.Cancel)
+        button_box.accepted.connect(self.save_settings)
+        button_box.rejected.connect(self.reject)
+        button_layout.addWidget(button_box)
         
         self.layout.addLayout(button_layout)
     
@@ -174,16 +221,32 @@ class SettingsDialog(QDialog):
     
     def validate_settings(self):
         """Validate settings."""
-        # Validate host
-        host = self.host_edit.text().strip()
-        if not host:
-            QMessageBox.warning(self, "Invalid Host", "Host cannot be empty")
-            return False
+        self.error_label.clear()
+        
+        # Validate host; tabs that were never opened still hold the configured values
+        if self.server_tab not in self.pending_tabs:
+            host = self.host_edit.text().strip()
+            if not HOST_PATTERN.fullmatch(host):
+                self.show_error(self.server_tab, self.host_edit, "Host must be a host name or IP address")
+                return False
+            
+            # The validator still lets through partly typed ports, such as "80"
+            port = self.port_edit.text()
+            if not port.isdigit() or not PORT_RANGE[0] <= int(port) <= PORT_RANGE[1]:
+                self.show_error(self.server_tab, self.port_edit, f"Port must be between {PORT_RANGE[0]} and {PORT_RANGE[1]}")
+                return False
         
         # Validate model directory
-        model_dir = self.model_dir_edit.text().strip()
-        if not model_dir:
-            QMessageBox.warning(self, "Invalid Model Directory", "Model directory cannot be empty")
-            return False
+        if self.model_tab not in self.pending_tabs:
+            model_dir = self.model_dir_edit.text().strip()
+            if not model_dir:
+                self.show_error(self.model_tab, self.model_dir_edit, "Model directory cannot be empty")
+                return False
         
         return True
+    
+    def show_error(self, tab, widget, message):
+        """Show a validation error and move to the field that caused it."""
+        self.error_label.setText(message)
+        self.tabs.setCurrentWidget(tab)
+        widget.setFocus()
@@ -1,21 +1,15 @@
 """
 Stylesheet definitions for the BitNet.cpp desktop application.
 """
+import re
+from functools import lru_cache
 
-# Light theme stylesheet
-LIGHT_STYLESHEET = """
-QMainWindow {
-    background-color: #f5f5f5;
-}
-
+# Rules shared by both themes: geometry, typography and the accent colors
+BASE_STYLESHEET = """
 QWidget {
     font-family: 'Segoe UI', Arial, sans-serif;
 }
 
-QLabel {
-    color: #333333;
-}
-
 QPushButton {
     background-color: #0078d7;
     color: white;
@@ -32,16 +26,9 @@ QPushButton:pressed {
     background-color: #004e8c;
 }
 
-QPushButton:disabled {
-    background-color: #cccccc;
-    color: #666666;
-}
-
 QComboBox {
-    border: 1px solid #cccccc;
     border-radius: 4px;
     padding: 4px;
-    background-color: white;
 }
 
 QComboBox::drop-down {
@@ -50,13 +37,10 @@ QComboBox::drop-down {
 }
 
 QTextEdit, QTextBrowser {
-    border: 1px solid #cccccc;
     border-radius: 4px;
-    background-color: white;
 }
 
 QGroupBox {
-    border: 1px solid #cccccc;
     border-radius: 4px;
     margin-top: 1ex;
     padding-top: 1ex;
@@ -69,30 +53,17 @@ QGroupBox::title {
 }
 
 QTabWidget::pane {
-    border: 1px solid #cccccc;
     border-radius: 4px;
 }
 
 QTabBar::tab {
-    background-color: #e6e6e6;
-    border: 1px solid #cccccc;
-    border-bottom: none;
     border-top-left-radius: 4px;
     border-top-right-radius: 4px;
     padding: 6px 12px;
     margin-right: 2px;
 }
 
-QTabBar::tab:selected {
-    background-color: white;
-}
-
-QTabBar::tab:hover {
-    background-color: #f0f0f0;
-}
-
 QProgressBar {
-    border: 1px solid #cccccc;
     border-radius: 4px;
     text-align: center;
 }
@@ -102,9 +73,7 @@ QProgressBar::chunk {
 }
 
 QSlider::groove:horizontal {
-    border: 1px solid #cccccc;
     height: 8px;
-    background: #f0f0f0;
     margin: 2px 0;
     border-radius: 4px;
 }
@@ -123,42 +92,85 @@ QSlider::handle:horizontal:hover {
 }
 
 QSpinBox {
-    border: 1px solid #cccccc;
     border-radius: 4px;
     padding: 4px;
-    background-color: white;
 }
 """
 
-# Dark theme stylesheet
-DARK_STYLESHEET = """
+# Light theme colors
+LIGHT_COLORS = """
 QMainWindow {
-    background-color: #2d2d2d;
+    background-color: #f5f5f5;
 }
 
-QWidget {
-    font-family: 'Segoe UI', Arial, sans-serif;
-    color: #e0e0e0;
+QLabel {
+    color: #333333;
 }
 
-QLabel {
-    color: #e0e0e0;
+QPushButton:disabled {
+    background-color: #cccccc;
+    color: #666666;
 }
 
-QPushButton {
-    background-color: #0078d7;
-    color: white;
-    border: none;
-    padding: 6px 12px;
-    border-radius: 4px;
+QComboBox {
+    border: 1px solid #cccccc;
+    background-color: white;
 }
 
-QPushButton:hover {
-    background-color: #0063b1;
+QTextEdit, QTextBrowser {
+    border: 1px solid #cccccc;
+    background-color: white;
 }
 
-QPushButton:pressed {
-    background-color: #004e8c;
+QGroupBox {
+    border: 1px solid #cccccc;
+}
+
+QTabWidget::pane {
+    border: 1px solid #cccccc;
+}
+
+QTabBar::tab {
+    background-color: #e6e6e6;
+    border: 1px solid #cccccc;
+    border-bottom: none;
+}
+
+QTabBar::tab:selected {
+    background-color: white;
+}
+
+QTabBar::tab:hover {
+    background-color: #f0f0f0;
+}
+
+QProgressBar {
+    border: 1px solid #cccccc;
+}
+
+QSlider::groove:horizontal {
+    border: 1px solid #cccccc;
+    background: #f0f0f0;
+}
+
+QSpinBox {
+    border: 1px solid #cccccc;
+    background-color: white;
+}
+"""
+
+# Dark theme colors
+DARK_COLORS = """
+QMainWindow {
+    background-color: #2d2d2d;
+}
+
+QWidget {
+    color: #e0e0e0;
+}
+
+QLabel {
+    color: #e0e0e0;
 }
 
 QPushButton:disabled {
@@ -168,51 +180,32 @@ QPushButton:disabled {
 
 QComboBox {
     border: 1px solid #555555;
-    border-radius: 4px;
-    padding: 4px;
     background-color: #3d3d3d;
     color: #e0e0e0;
 }
 
-QComboBox::drop-down {
-    border: none;
-    width: 20px;
-}
-
 QTextEdit, QTextBrowser {
     border: 1px solid #555555;
-    border-radius: 4px;
     background-color: #3d3d3d;
     color: #e0e0e0;
 }
 
 QGroupBox {
     border: 1px solid #555555;
-    border-radius: 4px;
-    margin-top: 1ex;
-    padding-top: 1ex;
 }
 
 QGroupBox::title {
-    subcontrol-origin: margin;
-    subcontrol-position: top center;
-    padding: 0 3px;
     color: #e0e0e0;
 }
 
 QTabWidget::pane {
     border: 1px solid #555555;
-    border-radius: 4px;
 }
 
 QTabBar::tab {
     background-color: #3d3d3d;
     border: 1px solid #555555;
     border-bottom: none;
-    border-top-left-radius: 4px;
-    border-top-right-radius: 4px;
-    padding: 6px 12px;
-    margin-right: 2px;
 }
 
 QTabBar::tab:selected {
@@ -225,40 +218,41 @@ QTabBar::tab:hover {
 
 QProgressBar {
     border: 1px solid #555555;
-    border-radius: 4px;
-    text-align: center;
-}
-
-QProgressBar::chunk {
-    background-color: #0078d7;
 }
 
 QSlider::groove:horizontal {
     border: 1px solid #555555;
-    height: 8px;
     background: #3d3d3d;
-    margin: 2px 0;
-    border-radius: 4px;
-}
-
-QSlider::handle:horizontal {
-    background: #0078d7;
-    border: 1px solid #0078d7;
-    width: 18px;
-    margin: -2px 0;
-    border-radius: 9px;
-}
-
-QSlider::handle:horizontal:hover {
-    background: #0063b1;
-    border: 1px solid #0063b1;
 }
 
 QSpinBox {
     border: 1px solid #555555;
-    border-radius: 4px;
-    padding: 4px;
     background-color: #3d3d3d;
     color: #e0e0e0;
 }
 """
+
+# Theme stylesheets; the shared rules come last so that, for example,
+# button text stays white over the dark theme's default text color
+LIGHT_STYLESHEET = LIGHT_COLORS + BASE_STYLESHEET
+DARK_STYLESHEET = DARK_COLORS + BASE_STYLESHEET
+
+# Whitespace the stylesheet parser does not need
+QSS_WHITESPACE = re.compile(r"\s+")
+QSS_PUNCTUATION_SPACE = re.compile(r"\s*([{}:;,])\s*")
+
+def minify_qss(stylesheet):
+    """Strip a stylesheet down to what Qt's parser needs."""
+    stylesheet = QSS_WHITESPACE.sub(" ", stylesheet)
+    stylesheet = QSS_PUNCTUATION_SPACE.sub(r"\1", stylesheet)
+    return stylesheet.replace(";}", "}").strip()
+
+STYLESHEETS = {
+    "light": LIGHT_STYLESHEET,
+    "dark": DARK_STYLESHEET,
+}
+
+@lru_cache(maxsize=len(STYLESHEETS))
+def get_stylesheet(theme):
+    """Get the minified stylesheet of a theme ("light" or "dark"), reusing it on theme switches."""
+    return minify_qss(STYLESHEETS[theme])